@@ -0,0 +1,70 @@
+import multiprocessing
+import uuid
+
+import numpy as np
+import pytest
+
+from xmipy.coupling import SharedArray
+
+
+def double_values(name_in, name_out, size, count):
+    with (
+        SharedArray(name_in, size) as shared_in,
+        SharedArray(name_out, size) as shared_out,
+    ):
+        values = np.empty(size)
+        for _ in range(count):
+            shared_in.receive(values, timeout=10.0)
+            shared_out.publish(2.0 * values, timeout=10.0)
+
+
+def test_shared_array_processes():
+    size = 1000
+    count = 5
+    name_in = "xmipy_" + uuid.uuid4().hex[:8]
+    name_out = "xmipy_" + uuid.uuid4().hex[:8]
+
+    with (
+        SharedArray(name_in, size, create=True) as shared_in,
+        SharedArray(name_out, size, create=True) as shared_out,
+    ):
+        process = multiprocessing.get_context("spawn").Process(
+            target=double_values, args=(name_in, name_out, size, count)
+        )
+        process.start()
+        try:
+            for i in range(count):
+                values = np.arange(size, dtype=np.float64) + i
+                assert shared_in.publish(values, timeout=10.0) == i + 1
+                np.testing.assert_array_equal(
+                    shared_out.receive(timeout=10.0), 2.0 * values
+                )
+        finally:
+            process.join(timeout=10.0)
+        assert process.exitcode == 0
+        assert shared_in.received == count
+
+
+def test_shared_array_barrier():
+    name = "xmipy_" + uuid.uuid4().hex[:8]
+    with SharedArray(name, (2, 3), dtype=np.int32, create=True) as publisher:
+        receiver = SharedArray(name, (2, 3), dtype=np.int32)
+
+        # nothing published yet
+        with pytest.raises(TimeoutError):
+            receiver.receive(timeout=0.01)
+
+        publisher.publish(np.ones((2, 3), dtype=np.int32))
+        # previous values not received yet
+        with pytest.raises(TimeoutError):
+            publisher.publish(np.ones((2, 3), dtype=np.int32), timeout=0.01)
+
+        dest = np.zeros((2, 3), dtype=np.int32)
+        assert receiver.receive(dest) is dest
+        assert dest.sum() == 6
+        assert receiver.published == receiver.received == 1
+
+        # data types are not converted
+        with pytest.raises(TypeError):
+            publisher.publish(np.ones((2, 3), dtype=np.float64))
+        receiver.close()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from xmipy.errors import InputError
+from xmipy.grid import Grid
+
+
+def unstructured_grid(face_nodes, nodes_per_face, index_base=1):
+    # 2 x 1 unit squares, the right one split into two triangles
+    #   0---1---2
+    #   |   | / |
+    #   3---4---5
+    return Grid(
+        id=1,
+        type="unstructured",
+        rank=2,
+        size=3,
+        x=np.array([0.0, 1.0, 2.0, 0.0, 1.0, 2.0]),
+        y=np.array([1.0, 1.0, 1.0, 0.0, 0.0, 0.0]),
+        node_count=6,
+        face_count=3,
+        nodes_per_face=np.array(nodes_per_face, dtype=np.int32),
+        face_nodes=np.array(face_nodes, dtype=np.int32),
+        index_base=index_base,
+    )
+
+
+@pytest.mark.parametrize(
+    ("face_nodes", "index_base"),
+    [
+        ([0, 1, 4, 3, 1, 2, 4, 2, 5, 4], 0),
+        # closed, as written by MODFLOW 6
+        ([1, 2, 5, 4, 1, 2, 3, 5, 2, 3, 6, 5, 3], 1),
+    ],
+)
+def test_grid_connectivity(face_nodes, index_base):
+    grid = unstructured_grid(face_nodes, [4, 3, 3], index_base)
+
+    np.testing.assert_array_equal(grid.indptr, [0, 4, 7, 10])
+    np.testing.assert_array_equal(grid.indices, [0, 1, 4, 3, 1, 2, 4, 2, 5, 4])
+    np.testing.assert_allclose(
+        grid.centroids, [[0.5, 0.5], [4 / 3, 2 / 3], [5 / 3, 1 / 3]]
+    )
+
+    indptr, indices = grid.neighbours
+    np.testing.assert_array_equal(indptr, [0, 1, 3, 4])
+    np.testing.assert_array_equal(indices, [1, 0, 2, 1])
+
+    # computed once
+    assert grid.centroids is grid.centroids
+    assert not grid.indices.flags.writeable
+
+
+def test_grid_unused_last_node():
+    # node 5 (6 one-based) is not part of any face
+    grid = unstructured_grid([1, 2, 5, 4, 1, 2, 3, 5, 2], [4, 3])
+
+    np.testing.assert_array_equal(grid.indices, [0, 1, 4, 3, 1, 2, 4])
+    np.testing.assert_allclose(grid.centroids, [[0.5, 0.5], [4 / 3, 2 / 3]])
+
+
+def test_grid_rectilinear():
+    grid = Grid(
+        id=1,
+        type="rectilinear",
+        rank=2,
+        size=2,
+        x=np.array([0.0, 1.0, 3.0]),
+        y=np.array([1.0, 0.0]),
+        shape=np.array([2, 3], dtype=np.int32),
+    )
+    np.testing.assert_allclose(grid.centroids, [[0.5, 0.5], [2.0, 0.5]])
+    with pytest.raises(InputError):
+        _ = grid.neighbours
@@ -104,3 +104,45 @@ def test_show_disabled_logger_message(caplog, modflow_lib_path):
         mf6.logger.info("info shown")
         assert len(caplog.record_tuples) == 1
         assert "info shown" in caplog.text
+
+
+def test_set_logger_level(caplog, modflow_lib_path):
+    mf6 = XmiWrapper(modflow_lib_path)
+
+    mf6.get_version()
+    assert len(caplog.record_tuples) == 0
+
+    mf6.set_logger_level("DEBUG")
+    assert mf6.logger.level == logging.DEBUG
+    mf6.get_version()
+    assert "execute function: get_version" in caplog.text
+
+    caplog.clear()
+    mf6.set_logger_level("INFO")
+    mf6.get_version()
+    assert len(caplog.record_tuples) == 0
+
+
+def test_show_logger_message_kernel_calls(caplog, modflow_lib_path):
+    mf6 = XmiWrapper(modflow_lib_path)
+
+    with xmipy.logger.show_logger_message(mf6.logger, logging.DEBUG):
+        mf6.get_version()
+    assert "execute function: get_version" in caplog.text
+
+    caplog.clear()
+    mf6.get_version()
+    assert len(caplog.record_tuples) == 0
+
+    # the level of a parent logger is followed after a refresh
+    root_level = logging.root.level
+    logging.root.setLevel(logging.DEBUG)
+    try:
+        mf6.refresh_dispatcher()
+        assert mf6._execute_function == mf6._execute_function_hooked
+        mf6.get_version()
+    finally:
+        logging.root.setLevel(root_level)
+    mf6.refresh_dispatcher()
+    assert mf6._execute_function == mf6._execute_function_fast
+    assert "execute function: get_version" in caplog.text
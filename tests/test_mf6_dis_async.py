@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from xmipy.asyncwrapper import AsyncXmiWrapper
+
+
+def test_async_run(flopy_dis, modflow_lib_path):
+    async def main():
+        async with AsyncXmiWrapper(
+            modflow_lib_path, working_directory=flopy_dis.sim_path
+        ) as mf6:
+            await mf6.initialize()
+            head_tag = await mf6.get_var_address("X", "TEST_MODEL_DIS")
+
+            # the event loop keeps running during the time steps
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            ticker = asyncio.create_task(tick())
+            end_time = await mf6.get_end_time()
+            while await mf6.get_current_time() < end_time:
+                await mf6.update()
+            ticker.cancel()
+
+            head = await mf6.get_value(head_tag)
+            thread_ids = await asyncio.gather(
+                *(mf6.run(threading.get_ident) for _ in range(3))
+            )
+            await mf6.finalize()
+        return end_time, head, thread_ids, ticks
+
+    end_time, head, thread_ids, ticks = asyncio.run(main())
+    assert end_time == 12.0
+    np.testing.assert_allclose(head[20], 1.0)
+    # all calls run on the same thread, other than the event loop
+    assert len(set(thread_ids)) == 1
+    assert thread_ids[0] != threading.get_ident()
+    assert ticks > 0
+
+
+def test_async_cloned_models_overlap(flopy_dis, modflow_lib_path):
+    barrier = threading.Barrier(2, timeout=10)
+
+    def meet(xmi):
+        # both models must be in their working directory at the same time
+        with xmi._cd():
+            return barrier.wait()
+
+    async def main():
+        models = [
+            AsyncXmiWrapper(
+                modflow_lib_path,
+                working_directory=flopy_dis.sim_path,
+                clone_library=True,
+            )
+            for _ in range(2)
+        ]
+        try:
+            return await asyncio.gather(*(mf6.run(meet, mf6.xmi) for mf6 in models))
+        finally:
+            for mf6 in models:
+                await mf6.close()
+
+    assert sorted(asyncio.run(main())) == [0, 1]
@@ -20,6 +20,23 @@ def flopy_dis_idomain_mf6(flopy_dis_idomain, modflow_lib_path, request):
     return flopy_dis_idomain, mf6
 
 
+@pytest.fixture
+def flopy_dis_mf6_cached(flopy_dis, modflow_lib_path, request):
+    mf6 = XmiWrapper(
+        lib_path=modflow_lib_path,
+        working_directory=flopy_dis.sim_path,
+        cache_metadata=True,
+    )
+
+    # If initialized, call finalize() at end of use
+    request.addfinalizer(mf6.__del__)
+
+    # Write output to screen
+    mf6.set_int("ISTDOUTTOFILE", 0)
+
+    return flopy_dis, mf6
+
+
 def test_get_component_name(flopy_dis_mf6):
     assert flopy_dis_mf6[1].get_component_name() == "MODFLOW 6"
 
@@ -309,13 +326,44 @@ def test_get_value_int_scalar(flopy_dis_idomain_mf6):
     )
 
 
-def test_get_value_at_indices(flopy_dis_idomain_mf6):
-    """Expects to be implemented as soon as `get_value_at_indices` is implemented"""
-    mf6 = flopy_dis_idomain_mf6[1]
+@pytest.mark.parametrize("dtype", [np.int32, np.int64])
+def test_get_value_at_indices(flopy_dis_mf6, dtype):
+    flopy_dis, mf6 = flopy_dis_mf6
     mf6.initialize()
 
-    with pytest.raises(NotImplementedError):
-        mf6.get_value_at_indices("", np.zeros((1, 1)), np.zeros((1, 1)))
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    head = mf6.get_value_ptr(head_tag)
+    head[:] = np.arange(head.size)
+
+    inds = np.array([0, 5, 89], dtype=dtype)
+    dest = np.zeros(3, dtype=np.float64)
+    result = mf6.get_value_at_indices(head_tag, dest, inds)
+    assert result is dest
+    np.testing.assert_array_equal(dest, [0.0, 5.0, 89.0])
+
+
+def test_get_value_at_indices_out_of_bounds(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    with pytest.raises(InputError, match="Indices out of bounds"):
+        mf6.get_value_at_indices(head_tag, np.zeros(1), np.array([90]))
+    with pytest.raises(InputError, match="Indices out of bounds"):
+        mf6.get_value_at_indices(head_tag, np.zeros(1), np.array([-1]))
+    with pytest.raises(InputError, match="same size as the indices"):
+        mf6.get_value_at_indices(head_tag, np.zeros(2), np.array([1]))
+
+
+def test_get_value_at_indices_dtype(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    dest = np.zeros(1, dtype=np.float32)
+    with pytest.raises(InputError, match="should have float64 elements"):
+        mf6.get_value_at_indices(head_tag, dest, np.array([1]))
+    np.testing.assert_array_equal(dest, [0.0])
 
 
 def test_set_value(flopy_dis_mf6):
@@ -338,12 +386,17 @@ def test_set_value(flopy_dis_mf6):
 
 
 def test_set_value_at_indices(flopy_dis_mf6):
-    """Expects to be implemented as soon as `set_value_at_indices` is implemented"""
-    mf6 = flopy_dis_mf6[1]
+    from xmipy.xmiwrapper import Indices
+
+    flopy_dis, mf6 = flopy_dis_mf6
     mf6.initialize()
 
-    with pytest.raises(NotImplementedError):
-        mf6.set_value_at_indices("", np.zeros((1, 1)), np.zeros((1, 1)))
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    inds = Indices(np.array([1, 2, 3], dtype=np.int32))
+    mf6.set_value_at_indices(head_tag, inds, np.array([7.0, 8.0, 9.0]))
+    mf6.set_value_at_indices(head_tag, inds, np.array([4.0, 5.0, 6.0]))
+
+    np.testing.assert_array_equal(mf6.get_value_ptr(head_tag)[1:4], [4.0, 5.0, 6.0])
 
 
 def test_get_grid_rank(flopy_dis_mf6):
@@ -417,3 +470,121 @@ def test_get_grid_face_edges(flopy_dis_mf6):
 
     with pytest.raises(NotImplementedError):
         mf6.get_grid_face_edges(1, np.zeros((1, 1)))
+
+
+def test_get_var_info(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    info = mf6.get_var_info(head_tag)
+    assert info.rank == 1
+    assert info.type == mf6.get_var_type(head_tag)
+    assert info.shape == (flopy_dis.nlay * flopy_dis.nrow * flopy_dis.ncol,)
+
+    # without caching nothing is stored
+    assert head_tag not in mf6._var_info
+
+
+def test_cache_metadata(flopy_dis_mf6_cached):
+    flopy_dis, mf6 = flopy_dis_mf6_cached
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    np.testing.assert_array_equal(
+        mf6.get_value(head_tag),
+        mf6.get_value_ptr(head_tag),
+    )
+    assert mf6.get_var_info(head_tag) is mf6._var_info[head_tag]
+    assert mf6.get_var_nbytes(head_tag) == mf6.get_var_itemsize(head_tag) * 90
+    assert mf6._var_info[head_tag].nbytes == 720
+
+    mxit_tag = mf6.get_var_address("MXITER", "SLN_1")
+    assert mf6.get_value(mxit_tag).tolist() == mf6.get_value_ptr(mxit_tag).tolist()
+
+    mf6.finalize()
+    assert mf6._var_info == {}
+
+
+def test_cache_var_info(flopy_dis_mf6_cached):
+    mf6 = flopy_dis_mf6_cached[1]
+    mf6.initialize()
+
+    mf6.cache_var_info()
+    assert set(mf6._var_info) == set(mf6.get_output_var_names()) | set(
+        mf6.get_input_var_names()
+    )
+
+    mf6.clear_var_info()
+    assert mf6._var_info == {}
+
+
+def test_cache_var_info_not_activated(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    with pytest.raises(InputError, match="Metadata caching not activated"):
+        mf6.cache_var_info()
+
+
+def test_get_values(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    mxit_tag = mf6.get_var_address("MXITER", "SLN_1")
+    name_tag = mf6.get_var_address("NAME", flopy_dis.model_name)
+
+    dests = {}
+    values = mf6.get_values([head_tag, mxit_tag, name_tag], dests)
+    assert values is dests
+    np.testing.assert_array_equal(values[head_tag], mf6.get_value_ptr(head_tag))
+    assert values[mxit_tag].tolist() == [25]
+    assert values[name_tag].tolist() == ["TEST_MODEL_DIS"]
+
+    # buffers are reused
+    head = dests[head_tag]
+    mf6.get_values([head_tag], dests)
+    assert dests[head_tag] is head
+
+    # and checked before the kernel copies into them
+    with pytest.raises(InputError, match="should have shape"):
+        mf6.get_values([head_tag], {head_tag: head[:-1].copy()})
+    with pytest.raises(InputError, match="should have float64 elements"):
+        mf6.get_values([head_tag], {head_tag: head.astype(np.float32)})
+
+
+def test_set_values(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    mxit_tag = mf6.get_var_address("MXITER", "SLN_1")
+
+    new_head = np.full(90, 3.0)
+    mf6.set_values({head_tag: new_head, mxit_tag: np.array([999], dtype=np.int32)})
+    np.testing.assert_array_equal(mf6.get_value_ptr(head_tag), new_head)
+    assert mf6.get_value(mxit_tag).tolist() == [999]
+
+
+def test_get_var_stringarray_boundnames(flopy_dis, modflow_lib_path, request):
+    mf6 = XmiWrapper(
+        lib_path=modflow_lib_path,
+        working_directory=flopy_dis.sim_path,
+        cache_strings=True,
+    )
+    request.addfinalizer(mf6.__del__)
+    mf6.set_int("ISTDOUTTOFILE", 0)
+    mf6.initialize()
+
+    # boundary names are not set until _rp, so we need this update()
+    mf6.update()
+
+    name_tag = mf6.get_var_address("BOUNDNAME_CST", flopy_dis.model_name, "CHD_0")
+    boundnames = mf6.get_value(name_tag)
+    assert boundnames.tolist() == ["BNDA", "BNDB"]
+
+    # cached until cleared
+    assert mf6.get_value(name_tag) is boundnames
+    mf6.clear_string_values(name_tag)
+    assert mf6.get_value(name_tag) is not boundnames
@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import numpy as np
+
+from xmipy.ensemble import Ensemble, Member
+
+
+def scale_head(mf6, member):
+    head_tag = mf6.get_var_address("X", "TEST_MODEL_DIS")
+    head = mf6.get_value_ptr(head_tag)
+    head *= float(member.name)
+
+
+def kill_crashing_member(_mf6, member):
+    if member.name.startswith("crash"):
+        os._exit(1)
+
+
+def test_ensemble(flopy_dis, modflow_lib_path, tmp_path):
+    members = []
+    for i in range(3):
+        sim_path = tmp_path / f"member_{i}"
+        shutil.copytree(flopy_dis.sim_path, sim_path)
+        members.append(Member(str(i + 1), sim_path))
+
+    head_tag = "TEST_MODEL_DIS/X"
+    with Ensemble(
+        modflow_lib_path,
+        max_workers=2,
+        outputs=[head_tag],
+        callback=scale_head,
+        timing=True,
+    ) as ensemble:
+        results = {result.name: result for result in ensemble.run(members)}
+
+    assert sorted(results) == ["1", "2", "3"]
+    for result in results.values():
+        assert result.error is None
+        assert result.times[-1] == 12.0
+        assert len(result.outputs[head_tag]) == len(result.times)
+        assert result.timing["total"] > 0.0
+        assert "kernel.update" in result.timing
+
+    # constant heads are not affected by the scaling
+    np.testing.assert_allclose(results["1"].outputs[head_tag][-1][20], 1.0)
+
+
+def test_ensemble_failing_member(flopy_dis, modflow_lib_path, tmp_path):
+    members = [
+        Member("good", flopy_dis.sim_path),
+        Member("bad", tmp_path / "does_not_exist"),
+    ]
+    with Ensemble(modflow_lib_path, max_workers=1) as ensemble:
+        results = {result.name: result for result in ensemble.run(members)}
+
+    assert results["good"].error is None
+    assert results["bad"].error is not None
+    assert results["bad"].times == []
+
+
+def test_ensemble_dying_worker(flopy_dis, modflow_lib_path, tmp_path):
+    members = []
+    for name in ["good_1", "crash", "good_2", "crash_2", "good_3"]:
+        sim_path = tmp_path / name
+        shutil.copytree(flopy_dis.sim_path, sim_path)
+        members.append(Member(name, sim_path))
+
+    with Ensemble(
+        modflow_lib_path, max_workers=2, callback=kill_crashing_member
+    ) as ensemble:
+        results = {result.name: result for result in ensemble.run(members)}
+
+    assert sorted(results) == ["crash", "crash_2", "good_1", "good_2", "good_3"]
+    assert "BrokenProcessPool" in results["crash"].error
+    assert "BrokenProcessPool" in results["crash_2"].error
+    for name in ["good_1", "good_2", "good_3"]:
+        assert results[name].error is None
+        assert results[name].times[-1] == 12.0
+
+
+def test_ensemble_on_output(flopy_dis, modflow_lib_path, tmp_path):
+    members = []
+    for i in range(2):
+        sim_path = tmp_path / f"member_{i}"
+        shutil.copytree(flopy_dis.sim_path, sim_path)
+        members.append(Member(str(i), sim_path))
+
+    head_tag = "TEST_MODEL_DIS/X"
+    received = []
+
+    def on_output(member, time, values):
+        received.append((member.name, time, values[head_tag]))
+
+    with Ensemble(
+        modflow_lib_path, max_workers=2, outputs=[head_tag], on_output=on_output
+    ) as ensemble:
+        results = {result.name: result for result in ensemble.run(members)}
+
+    for name, result in results.items():
+        assert result.error is None
+        assert result.outputs == {}
+        times = [time for member, time, _ in received if member == name]
+        assert times == result.times
+    np.testing.assert_allclose(received[-1][2][20], 1.0)
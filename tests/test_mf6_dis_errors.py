@@ -15,3 +15,19 @@ def test_err_unknown_var(flopy_dis_mf6):
     with pytest.raises(XMIError):
         var_address = mf6.get_var_address("X", "dissolution")
         mf6.get_value_ptr(var_address)
+
+
+def test_err_missing_function(flopy_dis_mf6):
+    """Functions not exported by the library raise an error naming them"""
+    mf6 = flopy_dis_mf6[1]
+
+    mf6._functions["update"] = mf6._missing_function("update")
+    with pytest.raises(XMIError, match="Function 'update' is not exported"):
+        mf6.update()
+
+
+def test_functions_prebound(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+
+    assert mf6._functions["solve"] is mf6.lib.solve
+    assert mf6.lib.solve.argtypes is not None
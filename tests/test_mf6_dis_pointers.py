@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from xmipy.pointers import ChangeTracker, PointerRegistry
+
+
+def test_pointer_registry_cached_view(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    pointers = PointerRegistry(mf6)
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    head = pointers[head_tag]
+
+    assert head_tag in pointers
+    assert len(pointers) == 1
+    assert pointers[head_tag] is head
+    np.testing.assert_array_equal(head, mf6.get_value_ptr(head_tag))
+
+
+def test_pointer_registry_validate(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    pointers = PointerRegistry(mf6)
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    mxit_tag = mf6.get_var_address("MXITER", "SLN_1")
+    head = pointers[head_tag]
+    pointers.register(mxit_tag)
+
+    mf6.update()
+    assert pointers.validate() == []
+    assert pointers[head_tag] is head
+
+    # a view into other memory is rebound to the kernel memory
+    pointers._views[head_tag] = head.copy()
+    assert pointers.is_stale(head_tag)
+    assert pointers.validate() == [head_tag]
+    assert pointers[head_tag].ctypes.data == mf6.get_value_ptr_address(head_tag)
+
+
+def test_pointer_registry_unregister(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    pointers = PointerRegistry(mf6)
+    head_tag = mf6.get_var_address("X", flopy_dis.model_name)
+    pointers.register(head_tag)
+    pointers.unregister(head_tag)
+    assert head_tag not in pointers
+
+    pointers.register(head_tag)
+    pointers.clear()
+    assert len(pointers) == 0
+
+
+def test_checkpoint_restore(flopy_dis_mf6, tmp_path):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+    mf6.update()
+
+    head_tag = mf6.get_var_address("X", "TEST_MODEL_DIS")
+    path = tmp_path / "checkpoint.npz"
+    mf6.checkpoint(path)
+    head = mf6.get_value(head_tag)
+    current_time = mf6.get_current_time()
+
+    mf6.update()
+    assert mf6.get_current_time() > current_time
+    mf6.get_value_ptr(head_tag)[:] = -1.0
+
+    mf6.restore(path)
+    np.testing.assert_array_equal(mf6.get_value(head_tag), head)
+    assert mf6.get_current_time() == current_time
+
+
+def test_checkpoint_names(flopy_dis_mf6, tmp_path):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", "TEST_MODEL_DIS")
+    path = tmp_path / "checkpoint.npz"
+    mf6.checkpoint(path, [head_tag])
+    # a member per variable, so that no size limit applies to all together
+    with np.load(path) as checkpoint:
+        assert checkpoint.files == [head_tag]
+
+
+@pytest.mark.parametrize("block_size", [None, 10])
+def test_change_tracker(flopy_dis_mf6, block_size):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    pointers = PointerRegistry(mf6)
+    atol = 0.1 if block_size is None else 0.0
+    tracker = ChangeTracker(pointers, atol=atol, block_size=block_size)
+    head_tag = mf6.get_var_address("X", "TEST_MODEL_DIS")
+    tracker.track(head_tag)
+    assert not tracker.changed(head_tag)
+
+    head = pointers[head_tag]
+    head[3] += 0.05
+    head[42] += 1.0
+    changed = tracker.changes(head_tag, commit=True)
+    if block_size is None:
+        assert changed.tolist() == [42]
+    else:
+        assert changed.tolist() == list(range(10)) + list(range(40, 50))
+    assert not tracker.changed(head_tag)
+
+    # small changes add up until they exceed the tolerance
+    head[3] += 0.06
+    assert tracker.changed(head_tag)
+    tracker.commit()
+    assert not tracker.changed(head_tag)
+
+
+def test_change_tracker_block_tolerance(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+
+    with pytest.raises(ValueError, match="Tolerances are not supported"):
+        ChangeTracker(PointerRegistry(mf6), atol=0.1, block_size=10)
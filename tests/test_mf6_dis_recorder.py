@@ -0,0 +1,42 @@
+import numpy as np
+
+from xmipy.recorder import Recorder, load_recording
+from xmipy.simulation import Simulation
+
+
+def test_recorder(flopy_dis_mf6, tmp_path):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", "TEST_MODEL_DIS")
+    heads = []
+
+    def record(_sim):
+        recorder.record()
+        heads.append(mf6.get_value(head_tag))
+
+    with Recorder(mf6, [head_tag], tmp_path / "output", chunk_size=3) as recorder:
+        Simulation(mf6, post_step=[record]).run()
+
+    times, recorded = load_recording(tmp_path / "output", head_tag)
+    np.testing.assert_array_equal(times, [3.0, 6.0, 9.0, 12.0])
+    np.testing.assert_array_equal(recorded, np.stack(heads))
+    # two chunks of at most three snapshots
+    assert len(list((tmp_path / "output" / head_tag).glob("*.npy"))) == 2
+
+
+def test_recorder_reallocated(flopy_dis_mf6, tmp_path):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    head_tag = mf6.get_var_address("X", "TEST_MODEL_DIS")
+    with Recorder(mf6, [head_tag], tmp_path / "output") as recorder:
+        recorder.record()
+        # as if the kernel reallocated the variable
+        recorder.pointers._views[head_tag] = np.zeros(3)
+        recorder.record()
+        assert recorder.pointers[head_tag].shape != (3,)
+
+    times, recorded = load_recording(tmp_path / "output", head_tag)
+    assert len(times) == 2
+    np.testing.assert_array_equal(recorded[1], mf6.get_value(head_tag))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from xmipy.simulation import Simulation
+
+
+def test_simulation_run(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    iterations = []
+    steps = []
+    sim = Simulation(
+        mf6,
+        post_iteration=[lambda _sim, _cid, kiter, _conv: iterations.append(kiter)],
+        post_step=[lambda sim: steps.append(sim.times[-1])],
+    )
+    sim.run()
+
+    assert sim.subcomponent_count == 1
+    assert sim.times == steps == [3.0, 6.0, 9.0, 12.0]
+    assert all(sim.converged)
+    assert sum(count for (count,) in sim.iterations) == len(iterations)
+
+    head_tag = mf6.get_var_address("X", "SLN_1")
+    np.testing.assert_allclose(mf6.get_value(head_tag)[20], 1.0)
+
+
+def test_simulation_max_iterations(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+
+    # the maximum is read from the kernel for every time step
+    mxit_tag = mf6.get_var_address("MXITER", "SLN_1")
+    mf6.get_value_ptr(mxit_tag)[0] = 1
+    sim = Simulation(mf6)
+    sim.step()
+    assert sim.iterations == [(1,)]
+    assert sim.converged == [False]
@@ -1,7 +1,9 @@
+import platform
+
 import pytest
 
 from xmipy import XmiWrapper
-from xmipy.errors import TimerError
+from xmipy.errors import InputError, TimerError
 
 
 @pytest.fixture
@@ -26,6 +28,51 @@ def test_timing_initialize(flopy_dis_mf6_timing):
     assert mf6.report_timing_totals() > 0.0
 
 
+def test_timing_report(flopy_dis_mf6_timing):
+    mf6 = flopy_dis_mf6_timing[1]
+    mf6.initialize()
+    mf6.set_timing_period(1)
+    mf6.update()
+    mf6.set_timing_period(2)
+    mf6.update()
+    mf6.set_timing_period(None)
+
+    report = mf6.report_timing_totals()
+    update = report.to_dict()["update"]
+    assert update["count"] == 2
+    assert update["p50"] <= update["p95"] <= update["p99"] <= update["max"]
+    assert pytest.approx(sum(row.share for row in report.rows)) == 1.0
+    assert "initialize" in report.table()
+
+    report = mf6.report_timing_totals(group_by="period")
+    assert {"update@1", "update@2", "initialize"} <= set(report.to_dict())
+    assert pytest.approx(report) == mf6.report_timing_totals()
+
+
+def test_timing_by_variable(flopy_dis_mf6_timing):
+    mf6 = flopy_dis_mf6_timing[1]
+    mf6.initialize()
+    head_tag = mf6.get_var_address("X", "SLN_1")
+    mf6.set_timing_detail(by_variable=True, count_bytes=True)
+    head = mf6.get_value(head_tag)
+    mf6.get_value(head_tag, head)
+    mf6.set_value(head_tag, head)
+    mf6.get_value_ptr(head_tag)
+
+    report = mf6.report_timing_totals(group_by="variable").to_dict()
+    get_value = report[f"get_value[{head_tag}]"]
+    assert get_value["count"] == 2
+    assert get_value["nbytes"] == 2 * head.nbytes
+    assert get_value["throughput"] > 0.0
+    assert report[f"set_value[{head_tag}]"]["nbytes"] == head.nbytes
+    assert report[f"get_value_ptr[{head_tag}]"]["nbytes"] == 0
+    assert "initialize" in report
+
+    mf6.set_timing_detail(by_variable=False)
+    mf6.get_value(head_tag, head)
+    assert mf6.report_timing_totals().to_dict()["get_value"]["count"] == 3
+
+
 def test_timing_nothing(flopy_dis_mf6_timing):
     mf6 = flopy_dis_mf6_timing[1]
 
@@ -47,3 +94,114 @@ def test_dependencies(flopy_dis, modflow_lib_path):
         lib_dependency=modflow_lib_path,
         working_directory=flopy_dis.sim_path,
     )
+
+
+def test_timing_toggle(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+    assert mf6._execute_function == mf6._execute_function_fast
+
+    mf6.timing = True
+    assert mf6._execute_function == mf6._execute_function_hooked
+    mf6.initialize()
+    assert mf6.timer.timers.count("initialize") == 1
+
+    mf6.timing = False
+    assert mf6._execute_function == mf6._execute_function_fast
+    mf6.get_current_time()
+    assert "get_current_time" not in mf6.timer.timers
+
+
+def test_call_hooks(flopy_dis_mf6):
+    from xmipy.hooks import CallHook
+
+    class Recorder(CallHook):
+        def __init__(self):
+            self.calls = []
+
+        def post_call(self, call):
+            self.calls.append(call)
+
+    mf6 = flopy_dis_mf6[1]
+    recorder = Recorder()
+    mf6.add_call_hook(recorder)
+    assert mf6._execute_function == mf6._execute_function_hooked
+
+    mf6.initialize()
+    head_tag = mf6.get_var_address("X", "SLN_1")
+    mf6.get_value_ptr(head_tag)
+    names = [call.name for call in recorder.calls]
+    assert names[0] == "initialize"
+    assert "get_value_ptr" in names
+    call = recorder.calls[names.index("get_value_ptr")]
+    assert call.result == 0
+    assert call.detail == "for variable " + head_tag
+    assert call.end_ns >= call.start_ns > 0
+
+    mf6.remove_call_hook(recorder)
+    assert mf6._execute_function == mf6._execute_function_fast
+
+
+def test_trace_recorder(flopy_dis_mf6):
+    from xmipy.tracing import TraceRecorder
+
+    mf6 = flopy_dis_mf6[1]
+    recorder = TraceRecorder()
+    recorder.attach(mf6, "gwf")
+    mf6.initialize()
+    mf6.update()
+    recorder.detach(mf6)
+    mf6.get_current_time()
+
+    events = recorder.to_chrome_trace()["traceEvents"]
+    names = [event["name"] for event in events]
+    assert names[0] == "initialize"
+    assert "update" in names
+    assert "get_current_time" not in names[names.index("update") :]
+    assert all(event["cat"] == "gwf" for event in events)
+
+
+def test_clone_library(flopy_dis, flopy_gwf_sto, modflow_lib_path):
+    mf6_dis = XmiWrapper(
+        lib_path=modflow_lib_path,
+        working_directory=flopy_dis.sim_path,
+        clone_library=True,
+    )
+    mf6_sto = XmiWrapper(
+        lib_path=modflow_lib_path,
+        working_directory=flopy_gwf_sto.sim_path,
+        clone_library=True,
+    )
+    clone = mf6_dis._lib_clone
+    assert clone.exists()
+    assert clone != mf6_sto._lib_clone
+
+    # both models run independently in the same process
+    mf6_dis.initialize()
+    mf6_sto.initialize()
+    mf6_dis.update()
+    assert mf6_dis.get_current_time() == 3.0
+    assert mf6_sto.get_current_time() == 0.0
+    name_tag = mf6_sto.get_var_address("NAME", flopy_gwf_sto.model_name)
+    assert mf6_sto.get_value(name_tag).tolist() == [flopy_gwf_sto.model_name]
+
+    mf6_dis.finalize()
+    mf6_sto.finalize()
+    if platform.system() != "Windows":
+        assert not clone.exists()
+
+
+def test_release_library(flopy_dis, modflow_lib_path):
+    mf6 = XmiWrapper(
+        lib_path=modflow_lib_path,
+        working_directory=flopy_dis.sim_path,
+        clone_library=True,
+    )
+    mf6.initialize()
+
+    # as at exit, before the clone is unloaded
+    mf6._release_library()
+    assert mf6._lib_released
+    # finalized, so nothing calls into the unloaded library anymore
+    with pytest.raises(InputError, match="not initialized"):
+        mf6.finalize()
+    mf6.__del__()
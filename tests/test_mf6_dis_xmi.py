@@ -13,6 +13,41 @@ def test_get_var_address(flopy_dis_mf6):
     assert k11_tag == flopy_dis.model_name.upper() + "/NPF/K11"
 
 
+def test_get_var_address_memoized(flopy_dis_mf6):
+    mf6 = flopy_dis_mf6[1]
+    mf6.initialize()
+    mf6.timing = True
+
+    for _ in range(3):
+        assert mf6.get_var_address("X", "SLN_1") == "SLN_1/X"
+    assert mf6.get_var_address("x", "sln_1") == "SLN_1/X"
+    assert mf6.timer.timers.count("get_var_address") == 1
+
+
+def test_var_catalogue(flopy_dis_mf6):
+    flopy_dis, mf6 = flopy_dis_mf6
+    mf6.initialize()
+
+    model_name = flopy_dis.model_name.upper()
+    catalogue = mf6.get_var_catalogue()
+    assert mf6.get_var_catalogue() is catalogue
+    assert len(catalogue) > 0
+    assert "SLN_1/X" in catalogue
+    assert "SLN_1" in catalogue.components()
+    assert "NPF" in catalogue.subcomponents(model_name)
+
+    k11_tag = model_name + "/NPF/K11"
+    assert catalogue.find(model_name, "npf", "k11") == [k11_tag]
+    assert k11_tag in catalogue.find(var_name="K11")
+    assert k11_tag in catalogue.glob(model_name.lower() + "/n?f/k*")
+    assert all(name.startswith("SLN_1/") for name in catalogue.glob("SLN_1/*"))
+    assert catalogue.address("k11", model_name, "npf") == k11_tag
+
+    mf6.finalize()
+    mf6.initialize()
+    assert mf6.get_var_catalogue() is not catalogue
+
+
 def test_prepare_time_step(flopy_dis_mf6):
     mf6 = flopy_dis_mf6[1]
     mf6.initialize()
@@ -65,3 +100,20 @@ def test_get_version(flopy_dis_mf6):
     mf6 = flopy_dis_mf6[1]
 
     assert len(mf6.get_version()) > 0
+
+
+def test_session(flopy_dis_mf6):
+    from pathlib import Path
+
+    flopy_dis, mf6 = flopy_dis_mf6
+    cwd = Path.cwd()
+
+    with mf6.session():
+        assert Path.cwd() == Path(flopy_dis.sim_path)
+        mf6.initialize()
+        mf6.prepare_time_step(mf6.get_time_step())
+        mf6.prepare_solve()
+        assert Path.cwd() == Path(flopy_dis.sim_path)
+        mf6.finalize()
+
+    assert Path.cwd() == cwd
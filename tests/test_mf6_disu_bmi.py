@@ -75,3 +75,37 @@ def test_get_grid_face_nodes(flopy_disu_mf6):
     )
     # these are the same objects
     assert model_grid_face_nodes is result
+
+
+def test_get_grid(flopy_disu_mf6):
+    flopy_disu, mf6 = flopy_disu_mf6
+    mf6.initialize()
+
+    grid = mf6.get_grid(1)
+    assert grid.type == "unstructured"
+    assert grid.face_count == flopy_disu.nrow * flopy_disu.ncol
+    assert grid.node_count == (flopy_disu.nrow + 1) * (flopy_disu.ncol + 1)
+    assert grid.x.shape == grid.y.shape == (grid.node_count,)
+    np.testing.assert_array_equal(grid.nodes_per_face, 4)
+    np.testing.assert_array_equal(grid.face_nodes[:5], [1, 2, 6, 5, 1])
+    assert not grid.x.flags.writeable
+
+    # cached until initialized again
+    assert mf6.get_grid(1) is grid
+    mf6.finalize()
+    mf6.initialize()
+    assert mf6.get_grid(1) is not grid
+
+
+def test_get_grid_connectivity(flopy_disu_mf6):
+    mf6 = flopy_disu_mf6[1]
+    mf6.initialize()
+
+    grid = mf6.get_grid(1)
+    assert grid.indptr.size == grid.face_count + 1
+    np.testing.assert_array_equal(grid.indices[:4], [0, 1, 5, 4])
+    assert grid.centroids.shape == (grid.face_count, 2)
+
+    # interior cells of the 3 x 3 grid have four neighbours
+    indptr, _ = grid.neighbours
+    assert np.diff(indptr).tolist() == [2, 3, 2, 3, 4, 3, 2, 3, 2]
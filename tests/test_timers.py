@@ -18,13 +18,23 @@ def test_timer_create_and_run():
     assert timer.report_totals() >= 0.09
 
 
-def test_timer_start_twice_fails():
+def test_timer_nested():
     scope_label = "theMethod"
     timer = Timer("aTimer", "Some text with details")
     timer.start(scope_label)
+    timer.start(scope_label)
+    timer.start("other")
+    time.sleep(0.01)
+    inner = timer.stop(scope_label)
+    timer.stop("other")
+    outer = timer.stop(scope_label)
+
+    assert outer > inner >= 0.009
+    assert timer.timers.count(scope_label) == 2
+    assert timer.timers.count("other") == 1
 
-    with pytest.raises(TimerError, match="Timer for theMethod is already running"):
-        timer.start(scope_label)
+    with pytest.raises(TimerError, match="Timer for theMethod is not running"):
+        timer.stop(scope_label)
 
 
 def test_timer_stop_nonexisting_fails():
@@ -48,3 +58,223 @@ def test_timer_multiple_subtimers():
     timer.stop(scope_label_2)
 
     assert timer.report_totals() > 0.019
+
+
+def test_timers_statistics():
+    import math
+    import random
+    import statistics
+
+    from xmipy.timers.timers import Timers
+
+    random.seed(0)
+    values = [random.lognormvariate(-6, 1) for _ in range(10000)]
+    timers = Timers()
+    for value in values:
+        timers.add("fn", value)
+
+    assert timers.count("fn") == len(values)
+    assert math.isclose(timers.total("fn"), sum(values))
+    assert timers.min("fn") == min(values)
+    assert timers.max("fn") == max(values)
+    assert math.isclose(timers.mean("fn"), statistics.mean(values))
+    assert math.isclose(timers.stdev("fn"), statistics.stdev(values))
+
+    # estimated within the width of a histogram bucket
+    median = statistics.median(values)
+    assert abs(timers.median("fn") - median) / median < 0.1
+    p99 = statistics.quantiles(values, n=100)[-1]
+    assert abs(timers.percentile("fn", 99) - p99) / p99 < 0.1
+
+    # raw timings are not kept
+    assert timers._timings == {}
+    with pytest.raises(TimerError, match="Timings are not kept"):
+        timers.apply(len, "fn")
+
+
+def test_timers_keep_samples():
+    import math
+    import statistics
+
+    from xmipy.timers.timers import Timers
+
+    values = [0.3, 0.1, 0.2, 0.4]
+    timers = Timers(keep_samples=True)
+    for value in values:
+        timers.add("fn", value)
+
+    assert timers.median("fn") == statistics.median(values)
+    assert timers.apply(len, "fn") == 4
+
+    with pytest.raises(KeyError):
+        timers.mean("other")
+
+    timers.add("single", 0.1)
+    assert math.isnan(timers.stdev("single"))
+
+    timers.clear()
+    assert len(timers) == 0
+
+
+def test_timer_threads():
+    import threading
+
+    timer = Timer("timer", "Some text")
+
+    def work():
+        for _ in range(100):
+            timer.start("work")
+            timer.start("inner")
+            timer.stop("inner")
+            timer.stop("work")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    timers = timer.timers
+    assert timers.count("work") == 800
+    assert timers.count("inner") == 800
+    assert timers.total("work") >= timers.total("inner")
+
+    timer.clear()
+    assert len(timer.timers) == 0
+
+
+def test_timer_threads_combine_while_timing():
+    import threading
+
+    timer = Timer("timer", "Some text")
+    done = threading.Event()
+
+    def work(thread):
+        for index in range(20_000):
+            timer.add(f"work{thread}@{index}", 1e-6)
+        done.set()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    # new keys are added while the timings of all threads are combined
+    while not done.is_set():
+        _ = timer.timers
+    for thread in threads:
+        thread.join()
+
+    assert len(timer.timers) == 40_000
+
+
+def test_timer_asyncio_tasks():
+    import asyncio
+
+    timer = Timer("timer", "Some text")
+
+    async def work(delay):
+        timer.start("work")
+        await asyncio.sleep(delay)
+        return timer.stop("work")
+
+    async def main():
+        return await asyncio.gather(work(0.05), work(0.01))
+
+    slow, fast = asyncio.run(main())
+    assert slow > 0.04
+    assert 0.009 < fast < 0.04
+    assert timer.timers.count("work") == 2
+
+
+def test_timers_merge():
+    import math
+    import statistics
+
+    from xmipy.timers.timers import Timers
+
+    values_a = [0.1, 0.2, 0.3]
+    values_b = [0.5, 0.7]
+    timers_a, timers_b = Timers(), Timers()
+    for value in values_a:
+        timers_a.add("fn", value)
+    for value in values_b:
+        timers_b.add("fn", value)
+    timers_a.merge(timers_b)
+
+    values = values_a + values_b
+    assert timers_a.count("fn") == 5
+    assert math.isclose(timers_a.total("fn"), sum(values))
+    assert math.isclose(timers_a.mean("fn"), statistics.mean(values))
+    assert math.isclose(timers_a.stdev("fn"), statistics.stdev(values))
+    assert timers_a.max("fn") == 0.7
+
+
+def test_timing_report():
+    import math
+    import pickle
+
+    from xmipy.timers.report import TimingReport, parse_timer_key
+    from xmipy.timers.timers import Timers
+
+    assert parse_timer_key("update") == ("update", None, None)
+    assert parse_timer_key("get_value@2") == ("get_value", None, "2")
+    assert parse_timer_key("get_value[SLN_1/X]@2") == ("get_value", "SLN_1/X", "2")
+
+    timers = Timers()
+    for value in [0.1, 0.2, 0.3]:
+        timers.add("update@1", value)
+    timers.add("update@2", 0.4)
+    timers.add("get_value@1", 1.5)
+
+    report = TimingReport.from_timers(timers)
+    assert math.isclose(report, 2.5)
+    assert [row.function for row in report.rows] == ["get_value", "update"]
+    update = report.to_dict()["update"]
+    assert update["count"] == 4
+    assert math.isclose(update["total"], 1.0)
+    assert math.isclose(update["mean"], 0.25)
+    assert math.isclose(update["share"], 0.4)
+    assert update["max"] == 0.4
+    assert 0.1 <= update["p50"] <= update["p95"] <= update["p99"] <= 0.4
+    assert "update" in report.table()
+
+    by_period = TimingReport.from_timers(timers, group_by="period")
+    assert set(by_period.to_dict()) == {"update@1", "update@2", "get_value@1"}
+    assert math.isclose(by_period, report)
+
+    restored = pickle.loads(pickle.dumps(report))
+    assert restored == report
+    assert restored.to_dict() == report.to_dict()
+
+    with pytest.raises(ValueError, match="Cannot group"):
+        TimingReport.from_timers(timers, group_by="model")
+
+
+def test_timing_report_by_variable():
+    import math
+
+    from xmipy.timers.report import TimingReport
+    from xmipy.timers.timers import Timers
+
+    timers = Timers()
+    timers.add("get_value[SLN_1/X]@1", 0.5, nbytes=8_000_000)
+    timers.add("get_value[SLN_1/X]@2", 0.5, nbytes=8_000_000)
+    timers.add("get_value[SLN_1/MXITER]@1", 0.1, nbytes=4)
+    timers.add("update@1", 1.0)
+
+    report = TimingReport.from_timers(timers)
+    get_value = report.to_dict()["get_value"]
+    assert get_value["count"] == 3
+    assert get_value["nbytes"] == 16_000_004
+
+    by_variable = TimingReport.from_timers(timers, group_by="variable").to_dict()
+    assert set(by_variable) == {
+        "get_value[SLN_1/X]",
+        "get_value[SLN_1/MXITER]",
+        "update",
+    }
+    x = by_variable["get_value[SLN_1/X]"]
+    assert x["variable"] == "SLN_1/X"
+    assert x["nbytes"] == 16_000_000
+    assert math.isclose(x["throughput"], 16.0)
+    assert by_variable["update"]["throughput"] == 0.0
+    assert "MB/s" in report.table()
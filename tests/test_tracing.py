@@ -0,0 +1,60 @@
+import json
+import threading
+
+from xmipy.tracing import TraceRecorder
+
+
+def test_trace_recorder(tmp_path):
+    recorder = TraceRecorder()
+    recorder.record("update", 1_000, 3_000, model="gwf")
+    with recorder.span("exchange", detail="for variable GWF/X"):
+        pass
+    assert len(recorder) == 2
+
+    path = tmp_path / "trace.json"
+    recorder.write(path)
+    trace = json.loads(path.read_text())
+    update, exchange = trace["traceEvents"]
+    assert update["name"] == "update"
+    assert update["ph"] == "X"
+    assert update["ts"] == 1.0
+    assert update["dur"] == 2.0
+    assert update["args"] == {"model": "gwf"}
+    assert update["tid"] == threading.get_native_id()
+    assert exchange["args"]["detail"] == "for variable GWF/X"
+    assert trace["otherData"]["dropped_events"] == 0
+
+
+def test_trace_recorder_ring_buffer():
+    recorder = TraceRecorder(capacity=3)
+    for i in range(5):
+        recorder.record(f"call_{i}", i, i + 1)
+    assert len(recorder) == 3
+    assert recorder.dropped == 2
+    names = [event["name"] for event in recorder.to_chrome_trace()["traceEvents"]]
+    assert names == ["call_2", "call_3", "call_4"]
+
+    recorder.clear()
+    assert len(recorder) == 0
+
+
+def test_trace_recorder_strings():
+    recorder = TraceRecorder(capacity=2)
+    for i in range(100):
+        recorder.record("get_value", i, i + 1, model="gwf", detail=f"variable {i}")
+    # only the strings of the last two events are kept
+    assert sorted(recorder._string_ids) == [
+        "",
+        "get_value",
+        "gwf",
+        "variable 98",
+        "variable 99",
+    ]
+    assert len(recorder._strings) <= 7
+    details = [
+        event["args"]["detail"] for event in recorder.to_chrome_trace()["traceEvents"]
+    ]
+    assert details == ["variable 98", "variable 99"]
+
+    recorder.clear()
+    assert recorder._strings == [""]
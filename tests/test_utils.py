@@ -44,3 +44,181 @@ def test_repr_function_call():
     ]
     for expected, args in cases:
         assert expected == repr_function_call("x", *args)
+
+
+def test_cd(tmp_path):
+    from pathlib import Path
+
+    from xmipy.utils import cd
+
+    cwd = Path.cwd()
+    with cd(tmp_path):
+        assert Path.cwd() == tmp_path
+        with cd(tmp_path):
+            assert Path.cwd() == tmp_path
+    assert Path.cwd() == cwd
+
+
+def test_directory_manager_nested(tmp_path):
+    from pathlib import Path
+
+    from xmipy.utils import DirectoryManager
+
+    cwd = Path.cwd()
+    dir_a = tmp_path / "a"
+    dir_b = tmp_path / "b"
+    dir_a.mkdir()
+    dir_b.mkdir()
+
+    manager = DirectoryManager()
+    with manager.enter(dir_a):
+        assert manager.current == dir_a
+        with manager.enter(dir_b):
+            assert Path.cwd() == dir_b
+        assert Path.cwd() == dir_a
+    assert manager.current is None
+    assert Path.cwd() == cwd
+
+
+def test_directory_manager_relative(tmp_path, monkeypatch):
+    from pathlib import Path
+
+    from xmipy.utils import DirectoryManager
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "sim1").mkdir()
+    (tmp_path / "sim2").mkdir()
+    sim1 = Path("sim1").absolute()
+
+    manager = DirectoryManager()
+    with manager.enter(Path("sim1")):
+        assert manager.current == tmp_path / "sim1"
+        # the same directory, given as an absolute path
+        with manager.enter(str(sim1)):
+            assert len(manager._frames) == 1
+        # resolved against the directory the manager is in
+        with manager.enter("../sim2"):
+            assert Path.cwd() == tmp_path / "sim2"
+        assert Path.cwd() == tmp_path / "sim1"
+    assert manager.current is None
+    assert Path.cwd() == tmp_path
+
+
+def test_directory_manager_threads(tmp_path):
+    import threading
+    from pathlib import Path
+
+    from xmipy.utils import DirectoryManager
+
+    cwd = Path.cwd()
+    manager = DirectoryManager()
+    results = []
+
+    def work(directory):
+        for _ in range(100):
+            with manager.enter(directory):
+                results.append(Path.cwd() == directory)
+
+    directories = [tmp_path / str(i) for i in range(4)]
+    threads = []
+    for directory in directories + directories:
+        directory.mkdir(exist_ok=True)
+        threads.append(threading.Thread(target=work, args=(directory,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 800
+    assert all(results)
+    assert Path.cwd() == cwd
+
+
+def test_directory_manager_shared_enter(tmp_path):
+    import threading
+    from pathlib import Path
+
+    from xmipy.utils import DirectoryManager
+
+    cwd = Path.cwd()
+    manager = DirectoryManager()
+    barrier = threading.Barrier(2)
+    results = []
+
+    def work():
+        with manager.enter(tmp_path):
+            barrier.wait()
+            # both threads hold tmp_path while entering the same subdirectory
+            with manager.enter(tmp_path / "y"):
+                results.append(Path.cwd() == tmp_path / "y")
+            barrier.wait()
+            results.append(Path.cwd() == tmp_path)
+
+    (tmp_path / "y").mkdir()
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+
+    assert results == [True] * 4
+    assert Path.cwd() == cwd
+
+
+def test_directory_manager_deadlock(tmp_path):
+    import threading
+    from pathlib import Path
+
+    from xmipy.utils import DirectoryManager
+
+    cwd = Path.cwd()
+    manager = DirectoryManager()
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def work(directory):
+        with manager.enter(tmp_path):
+            barrier.wait()
+            try:
+                with manager.enter(directory):
+                    pass
+            except RuntimeError as error:
+                errors.append(error)
+
+    threads = []
+    for name in ("y", "z"):
+        (tmp_path / name).mkdir()
+        threads.append(threading.Thread(target=work, args=(tmp_path / name,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+
+    # one of the threads gives up, the other enters once it is released
+    assert len(errors) == 1
+    assert manager.current is None
+    assert Path.cwd() == cwd
+
+
+def test_decode_records():
+    from ctypes import create_string_buffer
+
+    from xmipy.utils import decode_records
+
+    buffer = create_string_buffer(3 * 8)
+    buffer[0:6] = b"A/B\x00xy"
+    buffer[8:16] = b"CDEFGHIJ"
+    buffer[16:18] = b"K\x00"
+
+    assert decode_records(buffer, 3, 8) == ["A/B", "CDEFGHIJ", "K"]
+    assert decode_records(create_string_buffer(0), 0, 8) == []
+
+
+def test_split_address():
+    from xmipy.catalogue import split_address
+
+    assert split_address("GWF/NPF/K11") == ("GWF", "NPF", "K11")
+    assert split_address("SLN_1/MXITER") == ("SLN_1", "", "MXITER")
+    assert split_address("__INPUT__/GWF/NPF/K") == ("__INPUT__", "GWF/NPF", "K")
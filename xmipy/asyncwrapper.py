@@ -0,0 +1,303 @@
+"""Drive kernels from an asyncio event loop."""
+
+__all__ = ["AsyncXmiWrapper"]
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+from numpy.typing import NDArray
+
+from xmipy.timers.report import TimingReport
+from xmipy.xmiwrapper import Indices, VarInfo, XmiWrapper
+
+T = TypeVar("T")
+
+
+class AsyncXmiWrapper:
+    """Awaitable facade of `XmiWrapper`.
+
+    Every kernel call of the model runs on one dedicated thread, as the
+    state of a Fortran kernel is bound to the thread using it, while the
+    event loop stays responsive.
+
+    ctypes releases the GIL during the call, but every call also enters the
+    working directory of its model through `xmipy.utils.directory_manager`,
+    which is global to the process. Models loaded from cloned libraries (see
+    `clone_library`) therefore only run at the same time when they share one
+    working directory, calls of models in different directories take turns.
+    A `XmiWrapper.session` keeps its directory for the whole run, so other
+    models wait until it ends. Run models in separate processes, e.g. with
+    `xmipy.ensemble.Ensemble`, to overlap models in different directories.
+
+    ```
+    async def main():
+        async with AsyncXmiWrapper(lib_path, working_directory=sim_dir) as mf6:
+            await mf6.initialize()
+            while await mf6.get_current_time() < await mf6.get_end_time():
+                await mf6.update()
+            await mf6.finalize()
+    ```
+
+    Parameters
+    ----------
+    lib_path : Union[str, PathLike]
+        Path to the shared library.
+    *args, **kwargs
+        Passed on to `XmiWrapper`, which is created on the dedicated thread.
+    """
+
+    def __init__(
+        self, lib_path: Union[str, PathLike[Any]], *args: Any, **kwargs: Any
+    ) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="xmipy-" + str(lib_path)
+        )
+        try:
+            self.xmi: XmiWrapper = self._executor.submit(
+                XmiWrapper, lib_path, *args, **kwargs
+            ).result()
+        except BaseException:
+            self._executor.shutdown(wait=False)
+            raise
+
+    async def __aenter__(self) -> "AsyncXmiWrapper":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Wait for pending calls and stop the dedicated thread"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a function on the dedicated thread of the model
+
+        Use this for anything that calls into the kernel and has no
+        awaitable version, such as a sequence of calls in one go:
+
+        ```
+        await mf6.run(mf6.xmi.cache_var_info)
+        ```
+        """
+        loop = asyncio.get_running_loop()
+        if kwargs:
+            function = functools.partial(function, **kwargs)
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    # ===========================
+    # the BMI
+    # ===========================
+    async def initialize(self, config_file: Union[str, PathLike[Any]] = "") -> None:
+        await self.run(self.xmi.initialize, config_file)
+
+    async def initialize_mpi(self, value: int) -> None:
+        await self.run(self.xmi.initialize_mpi, value)
+
+    async def update(self) -> None:
+        await self.run(self.xmi.update)
+
+    async def update_until(self, time: float) -> None:
+        await self.run(self.xmi.update_until, time)
+
+    async def finalize(self) -> None:
+        await self.run(self.xmi.finalize)
+
+    async def get_current_time(self) -> float:
+        return await self.run(self.xmi.get_current_time)
+
+    async def get_start_time(self) -> float:
+        return await self.run(self.xmi.get_start_time)
+
+    async def get_end_time(self) -> float:
+        return await self.run(self.xmi.get_end_time)
+
+    async def get_time_step(self) -> float:
+        return await self.run(self.xmi.get_time_step)
+
+    async def get_time_units(self) -> str:
+        return await self.run(self.xmi.get_time_units)
+
+    async def get_component_name(self) -> str:
+        return await self.run(self.xmi.get_component_name)
+
+    async def get_input_item_count(self) -> int:
+        return await self.run(self.xmi.get_input_item_count)
+
+    async def get_output_item_count(self) -> int:
+        return await self.run(self.xmi.get_output_item_count)
+
+    async def get_input_var_names(self) -> Tuple[str]:
+        return await self.run(self.xmi.get_input_var_names)
+
+    async def get_output_var_names(self) -> Tuple[str]:
+        return await self.run(self.xmi.get_output_var_names)
+
+    async def get_var_grid(self, name: str) -> int:
+        return await self.run(self.xmi.get_var_grid, name)
+
+    async def get_var_type(self, name: str) -> str:
+        return await self.run(self.xmi.get_var_type, name)
+
+    async def get_var_shape(self, name: str) -> NDArray[np.int32]:
+        return await self.run(self.xmi.get_var_shape, name)
+
+    async def get_var_rank(self, name: str) -> int:
+        return await self.run(self.xmi.get_var_rank, name)
+
+    async def get_var_units(self, name: str) -> str:
+        return await self.run(self.xmi.get_var_units, name)
+
+    async def get_var_itemsize(self, name: str) -> int:
+        return await self.run(self.xmi.get_var_itemsize, name)
+
+    async def get_var_nbytes(self, name: str) -> int:
+        return await self.run(self.xmi.get_var_nbytes, name)
+
+    async def get_var_location(self, name: str) -> str:
+        return await self.run(self.xmi.get_var_location, name)
+
+    async def get_var_info(self, name: str) -> VarInfo:
+        return await self.run(self.xmi.get_var_info, name)
+
+    async def get_value(
+        self, name: str, dest: Optional[NDArray[Any]] = None
+    ) -> NDArray[Any]:
+        return await self.run(self.xmi.get_value, name, dest)
+
+    async def get_values(
+        self,
+        names: Iterable[str],
+        dests: Optional[MutableMapping[str, NDArray[Any]]] = None,
+    ) -> MutableMapping[str, NDArray[Any]]:
+        return await self.run(self.xmi.get_values, list(names), dests)
+
+    async def get_value_ptr(self, name: str) -> NDArray[Any]:
+        return await self.run(self.xmi.get_value_ptr, name)
+
+    async def get_value_at_indices(
+        self,
+        name: str,
+        dest: NDArray[Any],
+        inds: Union[NDArray[np.integer[Any]], Indices],
+    ) -> NDArray[Any]:
+        return await self.run(self.xmi.get_value_at_indices, name, dest, inds)
+
+    async def set_value(self, name: str, values: NDArray[Any]) -> None:
+        await self.run(self.xmi.set_value, name, values)
+
+    async def set_values(self, values: Mapping[str, NDArray[Any]]) -> None:
+        await self.run(self.xmi.set_values, values)
+
+    async def set_value_at_indices(
+        self,
+        name: str,
+        inds: Union[NDArray[np.integer[Any]], Indices],
+        src: NDArray[Any],
+    ) -> None:
+        await self.run(self.xmi.set_value_at_indices, name, inds, src)
+
+    async def get_grid_rank(self, grid: int) -> int:
+        return await self.run(self.xmi.get_grid_rank, grid)
+
+    async def get_grid_size(self, grid: int) -> int:
+        return await self.run(self.xmi.get_grid_size, grid)
+
+    async def get_grid_type(self, grid: int) -> str:
+        return await self.run(self.xmi.get_grid_type, grid)
+
+    async def get_grid_shape(
+        self, grid: int, shape: NDArray[np.int32]
+    ) -> NDArray[np.int32]:
+        return await self.run(self.xmi.get_grid_shape, grid, shape)
+
+    async def get_grid_x(
+        self, grid: int, x: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        return await self.run(self.xmi.get_grid_x, grid, x)
+
+    async def get_grid_y(
+        self, grid: int, y: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        return await self.run(self.xmi.get_grid_y, grid, y)
+
+    async def get_grid_z(
+        self, grid: int, z: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        return await self.run(self.xmi.get_grid_z, grid, z)
+
+    async def get_grid_node_count(self, grid: int) -> int:
+        return await self.run(self.xmi.get_grid_node_count, grid)
+
+    async def get_grid_face_count(self, grid: int) -> int:
+        return await self.run(self.xmi.get_grid_face_count, grid)
+
+    async def get_grid_face_nodes(
+        self, grid: int, face_nodes: NDArray[np.int32]
+    ) -> NDArray[np.int32]:
+        return await self.run(self.xmi.get_grid_face_nodes, grid, face_nodes)
+
+    async def get_grid_nodes_per_face(
+        self, grid: int, nodes_per_face: NDArray[np.int32]
+    ) -> NDArray[np.int32]:
+        return await self.run(self.xmi.get_grid_nodes_per_face, grid, nodes_per_face)
+
+    # ===========================
+    # the XMI
+    # ===========================
+    async def prepare_time_step(self, dt: float) -> None:
+        await self.run(self.xmi.prepare_time_step, dt)
+
+    async def do_time_step(self) -> None:
+        await self.run(self.xmi.do_time_step)
+
+    async def finalize_time_step(self) -> None:
+        await self.run(self.xmi.finalize_time_step)
+
+    async def get_subcomponent_count(self) -> int:
+        return await self.run(self.xmi.get_subcomponent_count)
+
+    async def prepare_solve(self, component_id: int = 1) -> None:
+        await self.run(self.xmi.prepare_solve, component_id)
+
+    async def solve(self, component_id: int = 1) -> bool:
+        return await self.run(self.xmi.solve, component_id)
+
+    async def finalize_solve(self, component_id: int = 1) -> None:
+        await self.run(self.xmi.finalize_solve, component_id)
+
+    async def get_version(self) -> str:
+        return await self.run(self.xmi.get_version)
+
+    async def report_timing_totals(
+        self, group_by: Optional[str] = None
+    ) -> TimingReport:
+        return await self.run(self.xmi.report_timing_totals, group_by)
+
+    async def get_var_address(
+        self, var_name: str, component_name: str, subcomponent_name: str = ""
+    ) -> str:
+        return await self.run(
+            self.xmi.get_var_address, var_name, component_name, subcomponent_name
+        )
@@ -0,0 +1,160 @@
+"""Index of the variables exposed by a kernel."""
+
+__all__ = ["VariableCatalogue", "split_address"]
+
+import bisect
+import fnmatch
+import re
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from xmipy.xmiwrapper import XmiWrapper
+
+_WILDCARDS = re.compile(r"[*?\[]")
+
+
+def split_address(name: str) -> Tuple[str, str, str]:
+    """Split a variable address into component, subcomponent and variable
+
+    ```
+    split_address("GWF/NPF/K11") == ("GWF", "NPF", "K11")
+    split_address("SLN_1/MXITER") == ("SLN_1", "", "MXITER")
+    ```
+    """
+    component, _, rest = name.partition("/")
+    subcomponent, _, var_name = rest.rpartition("/")
+    return component, subcomponent, var_name
+
+
+class VariableCatalogue:
+    """Index of the variable addresses of a kernel.
+
+    The input and output variable names are queried once, after which
+    lookups by component, subcomponent (package) or variable name are
+    dictionary lookups, and glob patterns only scan the addresses sharing
+    the literal prefix of the pattern. Addresses have the layout
+    COMPONENT/SUBCOMPONENT/VAR or COMPONENT/VAR, in upper case.
+
+    ```
+    catalogue = mf6.get_var_catalogue()
+    catalogue.find(subcomponent="RIV_0")
+    catalogue.glob("GWF_1/*/STAGE")
+    catalogue.address("X", "GWF_1")
+    ```
+
+    Parameters
+    ----------
+    xmi : XmiWrapper
+        The initialized kernel.
+    """
+
+    def __init__(self, xmi: "XmiWrapper"):
+        self.xmi = xmi
+        input_names = xmi.get_input_var_names()
+        output_names = xmi.get_output_var_names()
+        self.input_names: FrozenSet[str] = frozenset(input_names)
+        self.output_names: FrozenSet[str] = frozenset(output_names)
+        self.names: Tuple[str, ...] = tuple(dict.fromkeys(input_names + output_names))
+        self._sorted = sorted(self.names)
+
+        self._by_component: Dict[str, List[str]] = {}
+        self._by_subcomponent: Dict[Tuple[str, str], List[str]] = {}
+        self._by_var_name: Dict[str, List[str]] = {}
+        self._addresses: Dict[Tuple[str, str, str], str] = {}
+        for name in self.names:
+            component, subcomponent, var_name = split_address(name)
+            self._by_component.setdefault(component, []).append(name)
+            self._by_subcomponent.setdefault((component, subcomponent), []).append(name)
+            self._by_var_name.setdefault(var_name, []).append(name)
+            self._addresses[component, subcomponent, var_name] = name
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.input_names or name in self.output_names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def components(self) -> List[str]:
+        """The names of all components"""
+        return list(self._by_component)
+
+    def subcomponents(self, component: str) -> List[str]:
+        """The names of the subcomponents of a component"""
+        component = component.upper()
+        return [
+            subcomponent
+            for (candidate, subcomponent) in self._by_subcomponent
+            if candidate == component and subcomponent
+        ]
+
+    def find(
+        self,
+        component: Optional[str] = None,
+        subcomponent: Optional[str] = None,
+        var_name: Optional[str] = None,
+    ) -> List[str]:
+        """Find addresses by any combination of their parts
+
+        Parameters
+        ----------
+        component : str, optional
+            The component, e.g. a model or solution name.
+        subcomponent : str, optional
+            The subcomponent, e.g. a package name. Use "" for variables
+            directly below the component.
+        var_name : str, optional
+            The variable name.
+        """
+        candidates: Optional[List[str]] = None
+        if component is not None and subcomponent is not None:
+            key = (component.upper(), subcomponent.upper())
+            candidates = self._by_subcomponent.get(key, [])
+        elif component is not None:
+            candidates = self._by_component.get(component.upper(), [])
+        if var_name is not None:
+            var_name = var_name.upper()
+            if candidates is None:
+                candidates = self._by_var_name.get(var_name, [])
+            else:
+                candidates = [
+                    name for name in candidates if split_address(name)[2] == var_name
+                ]
+        if subcomponent is not None and component is None:
+            subcomponent = subcomponent.upper()
+            candidates = [
+                name
+                for name in (self.names if candidates is None else candidates)
+                if split_address(name)[1] == subcomponent
+            ]
+        return list(self.names if candidates is None else candidates)
+
+    def glob(self, pattern: str) -> List[str]:
+        """Find addresses matching a glob pattern, e.g. "GWF_1/RIV*/STAGE"
+
+        Matching is case insensitive, the addresses are returned sorted.
+        """
+        pattern = pattern.upper()
+        match = _WILDCARDS.search(pattern)
+        if match is None:
+            return [pattern] if pattern in self else []
+        prefix = pattern[: match.start()]
+        start = bisect.bisect_left(self._sorted, prefix)
+        stop = bisect.bisect_left(self._sorted, prefix + "\uffff", lo=start)
+        regex = re.compile(fnmatch.translate(pattern))
+        return [name for name in self._sorted[start:stop] if regex.match(name)]
+
+    def address(
+        self, var_name: str, component_name: str, subcomponent_name: str = ""
+    ) -> str:
+        """Get the address of a variable, like `XmiWrapper.get_var_address`
+
+        Addresses in the catalogue are resolved without calling the kernel.
+        """
+        key = (component_name.upper(), subcomponent_name.upper(), var_name.upper())
+        name = self._addresses.get(key)
+        if name is None:
+            name = self.xmi.get_var_address(var_name, component_name, subcomponent_name)
+        return name
@@ -0,0 +1,206 @@
+"""Exchange arrays between models in different processes."""
+
+__all__ = ["SharedArray"]
+
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple, Type, Union
+
+import numpy as np
+from numpy.typing import DTypeLike, NDArray
+
+if TYPE_CHECKING:
+    from xmipy.xmiwrapper import XmiWrapper
+
+# the header holds the sequence counters, the data is aligned after it
+_HEADER_SIZE = 64
+
+
+class SharedArray:
+    """Array in named shared memory, passed from one process to another.
+
+    One process publishes values, for instance straight from the
+    `get_value_ptr` view of its kernel, and another process receives them,
+    for instance straight into the pointer view of its kernel. An exchange
+    costs one copy on each side and no serialization.
+
+    Two sequence counters in the segment act as a barrier: `publish` waits
+    until the previous values have been received and `receive` waits until
+    new values have been published. There must be a single publishing and a
+    single receiving process.
+
+    ```
+    # process 1
+    shared = SharedArray("riv_stage", shape=(nriv,), create=True)
+    shared.publish_variable(model, "SW/STAGE")
+
+    # process 2
+    shared = SharedArray("riv_stage", shape=(nriv,))
+    shared.receive_variable(mf6, "GWF/RIV/STAGE")
+    ```
+
+    Parameters
+    ----------
+    name : str
+        Name of the shared memory segment.
+    shape : Tuple[int, ...]
+        Shape of the array.
+    dtype : DTypeLike, optional
+        Data type of the array, by default float64.
+    create : bool, optional
+        Whether the segment is created, by default False to attach to an
+        existing one. The creating process removes the segment on `close()`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shape: Union[int, Tuple[int, ...]],
+        dtype: DTypeLike = np.float64,
+        create: bool = False,
+    ):
+        self.shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.create = create
+        nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        if create:
+            self._shm = shared_memory.SharedMemory(
+                name=name, create=True, size=_HEADER_SIZE + nbytes
+            )
+        else:
+            self._shm = _attach(name)
+        self.name = self._shm.name
+
+        # sequence numbers of the last published and received values
+        self._counters: NDArray[np.int64] = np.ndarray(
+            (2,), dtype=np.int64, buffer=self._shm.buf
+        )
+        if create:
+            self._counters[:] = 0
+        self.array: NDArray[Any] = np.ndarray(
+            self.shape, dtype=self.dtype, buffer=self._shm.buf, offset=_HEADER_SIZE
+        )
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    @property
+    def published(self) -> int:
+        """Sequence number of the last published values"""
+        return int(self._counters[0])
+
+    @property
+    def received(self) -> int:
+        """Sequence number of the last received values"""
+        return int(self._counters[1])
+
+    def publish(self, src: NDArray[Any], timeout: Optional[float] = None) -> int:
+        """Copy values into shared memory once the previous ones are received
+
+        Returns
+        -------
+        int
+            The sequence number of the published values.
+        """
+        counters = self._counters
+        _wait_until(lambda: counters[1] == counters[0], timeout)
+        np.copyto(self.array, src.reshape(self.shape), casting="no")
+        counters[0] += 1
+        return int(counters[0])
+
+    def receive(
+        self, dest: Optional[NDArray[Any]] = None, timeout: Optional[float] = None
+    ) -> NDArray[Any]:
+        """Copy newly published values out of shared memory
+
+        Parameters
+        ----------
+        dest : NDArray, optional
+            Destination of the values, by default a new array.
+        timeout : float, optional
+            Seconds to wait for new values, by default without limit.
+        """
+        counters = self._counters
+        _wait_until(lambda: counters[0] != counters[1], timeout)
+        if dest is None:
+            dest = self.array.copy()
+        else:
+            np.copyto(dest.reshape(self.shape), self.array, casting="no")
+        counters[1] = counters[0]
+        return dest
+
+    def publish_variable(
+        self, xmi: "XmiWrapper", name: str, timeout: Optional[float] = None
+    ) -> int:
+        """Publish a variable straight from its pointer view in the kernel"""
+        return self.publish(xmi.get_value_ptr(name), timeout)
+
+    def receive_variable(
+        self,
+        xmi: "XmiWrapper",
+        name: str,
+        timeout: Optional[float] = None,
+        use_pointer: bool = True,
+    ) -> None:
+        """Receive a variable straight into the kernel
+
+        Parameters
+        ----------
+        xmi : XmiWrapper
+            The receiving kernel.
+        name : str
+            The variable address.
+        timeout : float, optional
+            Seconds to wait for new values, by default without limit.
+        use_pointer : bool, optional
+            Whether the values are copied into the pointer view of the
+            variable, by default True, otherwise `set_value` is used.
+        """
+        if use_pointer:
+            self.receive(xmi.get_value_ptr(name), timeout)
+        else:
+            counters = self._counters
+            _wait_until(lambda: counters[0] != counters[1], timeout)
+            xmi.set_value(name, self.array)
+            counters[1] = counters[0]
+
+    def close(self) -> None:
+        """Detach from the segment, and remove it if it was created here"""
+        del self._counters
+        del self.array
+        self._shm.close()
+        if self.create:
+            self._shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment without letting this process remove it at exit"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm
+
+
+def _wait_until(condition: Callable[[], Any], timeout: Optional[float]) -> None:
+    """Spin briefly, then poll with increasing sleeps up to a millisecond"""
+    for _ in range(1000):
+        if condition():
+            return
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 1e-6
+    while not condition():
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("Timed out waiting for the other process")
+        time.sleep(delay)
+        delay = min(2 * delay, 1e-3)
@@ -0,0 +1,374 @@
+"""Run ensembles of models in a pool of worker processes."""
+
+__all__ = ["Ensemble", "Member", "MemberResult"]
+
+import itertools
+import multiprocessing
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from os import PathLike
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Type,
+    Union,
+)
+
+from numpy.typing import NDArray
+
+from xmipy.timers.report import TimingReport
+from xmipy.xmiwrapper import XmiWrapper
+
+
+@dataclass
+class Member:
+    """A realisation of an ensemble
+
+    Parameters
+    ----------
+    name : str
+        Name to identify the member in its result.
+    working_directory : Union[str, PathLike]
+        The directory with the model input of the member.
+    config_file : Union[str, PathLike], optional
+        Passed to `XmiWrapper.initialize()`, by default "".
+    """
+
+    name: str
+    working_directory: Union[str, PathLike[Any]]
+    config_file: Union[str, PathLike[Any]] = ""
+
+
+@dataclass
+class MemberResult:
+    """The outcome of running an ensemble member
+
+    Attributes
+    ----------
+    name : str
+        The name of the member.
+    times : List[float]
+        The model time at the end of every time step.
+    outputs : Dict[str, List[NDArray]]
+        Copies of the selected output variables at the end of every time step.
+        They are streamed from the worker while the member runs, and are
+        empty when they were passed to the `on_output` callback instead.
+    timing : Dict[str, float]
+        Wall clock seconds spent in "initialize", "run", "finalize" and
+        "total". With kernel timing activated, the totals per kernel function
+        are added as well, prefixed by "kernel.".
+    error : str, optional
+        The traceback when the member failed, None otherwise.
+    """
+
+    name: str
+    times: List[float] = field(default_factory=list)
+    outputs: Dict[str, List[NDArray[Any]]] = field(default_factory=dict)
+    timing: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+# the queue a worker process streams the outputs of its members through
+_output_queue: Optional[Any] = None
+
+# seconds between draining the output queues while members run
+_POLL_INTERVAL = 0.01
+
+
+def _init_worker(queue: Any) -> None:
+    global _output_queue
+    _output_queue = queue
+
+
+def _run_member(
+    lib_path: Union[str, PathLike[Any]],
+    lib_dependency: Union[str, PathLike[Any], None],
+    member: Member,
+    key: int,
+    outputs: Sequence[str],
+    callback: Optional[Callable[[XmiWrapper, Member], None]],
+    timing: bool,
+) -> MemberResult:
+    """Run a single member in a worker process"""
+    result = MemberResult(member.name)
+    start = time.perf_counter()
+    mf6 = XmiWrapper(
+        lib_path,
+        lib_dependency=lib_dependency,
+        working_directory=member.working_directory,
+        timing=timing,
+    )
+    try:
+        with mf6.session():
+            mf6.initialize(member.config_file)
+            initialized = time.perf_counter()
+            result.timing["initialize"] = initialized - start
+
+            end_time = mf6.get_end_time()
+            current_time = mf6.get_current_time()
+            while current_time < end_time:
+                if callback is not None:
+                    callback(mf6, member)
+                mf6.update()
+                current_time = mf6.get_current_time()
+                result.times.append(current_time)
+                if outputs and _output_queue is not None:
+                    # written before the next step, blocks while the
+                    # parent process is behind on reading
+                    values = {name: mf6.get_value(name) for name in outputs}
+                    _output_queue.put((key, current_time, values))
+            result.timing["run"] = time.perf_counter() - initialized
+    except Exception:
+        result.error = traceback.format_exc()
+    finally:
+        finalize_start = time.perf_counter()
+        try:
+            mf6.finalize()
+        except Exception:
+            # the model was not initialized, or already failed
+            if result.error is None:
+                result.error = traceback.format_exc()
+        result.timing["finalize"] = time.perf_counter() - finalize_start
+        result.timing["total"] = time.perf_counter() - start
+        if timing:
+            for row in TimingReport.from_timers(mf6.timer.timers).rows:
+                result.timing["kernel." + row.function] = row.total
+    return result
+
+
+class _Pool:
+    """Worker processes with the queue they stream outputs through"""
+
+    def __init__(self, max_workers: int, mp_context: Any):
+        # a SimpleQueue writes in the calling thread, so everything a member
+        # streamed can be read once its result is available
+        self.queue = mp_context.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(self.queue,),
+        )
+
+
+@dataclass
+class _Submission:
+    """A member submitted to a pool"""
+
+    member: Member
+    key: int
+    pool: _Pool
+    isolated: bool
+    outputs: Dict[str, List[NDArray[Any]]]
+
+
+class Ensemble:
+    """Executor running ensemble members in a pool of worker processes.
+
+    The kernel keeps global state and a library is only loaded once per
+    process, so members run in worker processes, one at a time per worker.
+    A worker is reused for the next member after the previous one has been
+    finalized. The outputs of every time step are streamed to the process
+    calling `run` while the members run. When a worker process dies, e.g.
+    by a STOP in the kernel, the pool is replaced and the members which were
+    pending are run again, each in a pool of its own, to find the member
+    which killed it.
+
+    ```
+    members = [Member(f"r{i}", f"/path/to/sim_{i}") for i in range(100)]
+    with Ensemble("/path/to/libmf6.so", outputs=["GWF/X"]) as ensemble:
+        for result in ensemble.run(members):
+            print(result.name, result.timing["total"], result.error)
+    ```
+
+    Parameters
+    ----------
+    lib_path : Union[str, PathLike]
+        Path to the shared library.
+    lib_dependency : Union[str, PathLike, None], optional
+        Path to the dependencies of the shared library, by default None.
+    max_workers : int, optional
+        Number of worker processes, by default the number of processors.
+    outputs : Sequence[str], optional
+        Variable addresses copied back after every time step.
+    callback : Callable[[XmiWrapper, Member], None], optional
+        Called in the worker before every time step. It must be picklable,
+        i.e. defined at module level.
+    timing : bool, optional
+        Whether kernel functions are timed, by default False.
+    max_pending : int, optional
+        Maximum number of members submitted to the pool at once, by default
+        twice the number of workers. Members are taken from the iterable
+        passed to `run` only as results are consumed.
+    mp_context : multiprocessing context, optional
+        By default "spawn", so that workers never inherit a loaded library.
+    on_output : Callable[[Member, float, Dict[str, NDArray]], None], optional
+        Called in the process iterating over `run` with the member, the time
+        and the outputs of every time step as they arrive, instead of
+        collecting them in the `MemberResult`. The outputs of a member whose
+        worker died are passed again when it is rerun.
+    """
+
+    def __init__(
+        self,
+        lib_path: Union[str, PathLike[Any]],
+        lib_dependency: Union[str, PathLike[Any], None] = None,
+        max_workers: Optional[int] = None,
+        outputs: Sequence[str] = (),
+        callback: Optional[Callable[[XmiWrapper, Member], None]] = None,
+        timing: bool = False,
+        max_pending: Optional[int] = None,
+        mp_context: Optional[Any] = None,
+        on_output: Optional[
+            Callable[[Member, float, Dict[str, NDArray[Any]]], None]
+        ] = None,
+    ):
+        self.lib_path = lib_path
+        self.lib_dependency = lib_dependency
+        self.outputs = tuple(outputs)
+        self.callback = callback
+        self.timing = timing
+        self.on_output = on_output
+        if mp_context is None:
+            mp_context = multiprocessing.get_context("spawn")
+        self.mp_context = mp_context
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = _Pool(self.max_workers, self.mp_context)
+        self.max_pending = max_pending or 2 * self.max_workers
+        self._keys = itertools.count()
+
+    def __enter__(self) -> "Ensemble":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_traceback: Optional[TracebackType],
+    ) -> None:
+        self.shutdown(cancel_futures=exc_type is not None)
+
+    def shutdown(self, cancel_futures: bool = False) -> None:
+        """Stop the worker processes, after running members are finished"""
+        self._pool.executor.shutdown(wait=True, cancel_futures=cancel_futures)
+
+    def run(self, members: Iterable[Member]) -> Iterator[MemberResult]:
+        """Run members, yielding their results in order of completion
+
+        Failing members do not stop the ensemble, their result contains
+        the error instead. The outputs of every time step are received while
+        the members run and are added to the result of their member, or
+        passed to `on_output`.
+        """
+        members = iter(members)
+        pending: Set[Future[MemberResult]] = set()
+        submitted: Dict[Future[MemberResult], _Submission] = {}
+        # members pending when a worker died, each to be run in its own pool
+        suspects: Deque[Member] = deque()
+        timeout = _POLL_INTERVAL if self.outputs else None
+        try:
+            while True:
+                isolated = sum(sub.isolated for sub in submitted.values())
+                if suspects or isolated:
+                    while suspects and isolated < self.max_workers:
+                        pool = _Pool(1, self.mp_context)
+                        self._submit(suspects.popleft(), pool, pending, submitted)
+                        isolated += 1
+                else:
+                    while len(pending) < self.max_pending:
+                        next_member = next(members, None)
+                        if next_member is None:
+                            break
+                        self._submit(next_member, self._pool, pending, submitted)
+                if not pending:
+                    return
+                done, pending = wait(
+                    pending, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                self._receive(submitted)
+                for future in done:
+                    sub = submitted.pop(future)
+                    if sub.isolated:
+                        sub.pool.executor.shutdown(wait=False)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        # a worker process died, e.g. by a STOP in the kernel,
+                        # which fails all members pending in the pool
+                        if sub.pool is self._pool:
+                            self._pool.executor.shutdown(wait=False)
+                            self._pool = _Pool(self.max_workers, self.mp_context)
+                        if sub.isolated:
+                            yield MemberResult(
+                                sub.member.name, error=traceback.format_exc()
+                            )
+                        else:
+                            suspects.append(sub.member)
+                    except Exception:
+                        yield MemberResult(
+                            sub.member.name, error=traceback.format_exc()
+                        )
+                    else:
+                        result.outputs = sub.outputs
+                        yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            for sub in submitted.values():
+                if sub.isolated:
+                    sub.pool.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(
+        self,
+        member: Member,
+        pool: _Pool,
+        pending: Set["Future[MemberResult]"],
+        submitted: Dict["Future[MemberResult]", _Submission],
+    ) -> None:
+        key = next(self._keys)
+        future = pool.executor.submit(
+            _run_member,
+            self.lib_path,
+            self.lib_dependency,
+            member,
+            key,
+            self.outputs,
+            self.callback,
+            self.timing,
+        )
+        outputs: Dict[str, List[NDArray[Any]]] = {}
+        if self.on_output is None:
+            outputs = {name: [] for name in self.outputs}
+        pending.add(future)
+        submitted[future] = _Submission(
+            member, key, pool, pool is not self._pool, outputs
+        )
+
+    def _receive(self, submitted: Dict["Future[MemberResult]", _Submission]) -> None:
+        """Take the outputs streamed by the workers from their queues"""
+        by_key = {sub.key: sub for sub in submitted.values()}
+        for queue in {id(sub.pool): sub.pool.queue for sub in by_key.values()}.values():
+            while not queue.empty():
+                key, current_time, values = queue.get()
+                sub = by_key.get(key)
+                if sub is None:
+                    continue
+                if self.on_output is not None:
+                    self.on_output(sub.member, current_time, values)
+                else:
+                    for name, value in values.items():
+                        sub.outputs[name].append(value)
@@ -0,0 +1,266 @@
+"""Geometry of the grids of a kernel."""
+
+__all__ = ["Grid"]
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from xmipy.errors import InputError, XMIError
+
+if TYPE_CHECKING:
+    from xmipy.xmiwrapper import XmiWrapper
+
+# fills face node buffers, to find how many entries the kernel wrote
+_UNWRITTEN = np.iinfo(np.int32).min
+
+
+def _frozen(array: NDArray[Any]) -> NDArray[Any]:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class Grid:
+    """Geometry of a grid, as returned by `XmiWrapper.get_grid`
+
+    All arrays are read-only. The connectivity of unstructured grids is
+    derived on first use as compressed sparse row (CSR) arrays, and cached:
+    the nodes of face `i` are `indices[indptr[i]:indptr[i + 1]]`.
+
+    Attributes
+    ----------
+    id : int
+        The grid identifier.
+    type : str
+        The grid type, e.g. "rectilinear" or "unstructured".
+    rank : int
+        The number of dimensions.
+    size : int
+        The number of cells.
+    x, y : NDArray[np.float64]
+        The node coordinates. For rectilinear grids these are the coordinates
+        along the columns and rows, otherwise of every node.
+    z : NDArray[np.float64], optional
+        The node coordinates along the third dimension, for grids of rank 3
+        when provided by the kernel.
+    shape : NDArray[np.int32], optional
+        The number of nodes along every dimension, for structured grids.
+    node_count : int, optional
+        The number of nodes, for unstructured grids.
+    face_count : int, optional
+        The number of faces (cells), for unstructured grids.
+    nodes_per_face : NDArray[np.int32], optional
+        The number of nodes of every face, for unstructured grids.
+    face_nodes : NDArray[np.int32], optional
+        The nodes of all faces as written by the kernel, for unstructured
+        grids. MODFLOW 6 uses one-based nodes and closes every face by
+        repeating its first node.
+    index_base : int
+        The number of the first node in `face_nodes`, 1 for XMI kernels
+        like MODFLOW 6, 0 for zero-based numbering.
+    """
+
+    id: int
+    type: str
+    rank: int
+    size: int
+    x: NDArray[np.float64]
+    y: NDArray[np.float64]
+    z: Optional[NDArray[np.float64]] = None
+    shape: Optional[NDArray[np.int32]] = None
+    node_count: Optional[int] = None
+    face_count: Optional[int] = None
+    nodes_per_face: Optional[NDArray[np.int32]] = None
+    face_nodes: Optional[NDArray[np.int32]] = None
+    index_base: int = 1
+
+    @classmethod
+    def from_xmi(cls, xmi: "XmiWrapper", grid: int, index_base: int = 1) -> "Grid":
+        """Query the geometry of a grid from the kernel
+
+        `index_base` is the number of the first node in the face nodes
+        written by the kernel, 1 for MODFLOW 6.
+        """
+        grid_type = xmi.get_grid_type(grid)
+        rank = xmi.get_grid_rank(grid)
+        size = xmi.get_grid_size(grid)
+
+        if grid_type == "unstructured":
+            node_count = xmi.get_grid_node_count(grid)
+            face_count = xmi.get_grid_face_count(grid)
+            nodes_per_face = xmi.get_grid_nodes_per_face(
+                grid, np.empty(face_count, dtype=np.int32)
+            )
+            # room for a closing node per face
+            face_nodes = np.full(
+                int(nodes_per_face.sum()) + face_count, _UNWRITTEN, dtype=np.int32
+            )
+            xmi.get_grid_face_nodes(grid, face_nodes)
+            written = np.flatnonzero(face_nodes != _UNWRITTEN)
+            face_nodes = face_nodes[: written[-1] + 1 if written.size else 0]
+            return cls(
+                id=grid,
+                type=grid_type,
+                rank=rank,
+                size=size,
+                x=_frozen(xmi.get_grid_x(grid, np.empty(node_count))),
+                y=_frozen(xmi.get_grid_y(grid, np.empty(node_count))),
+                z=_get_grid_z(xmi, grid, rank, node_count),
+                node_count=node_count,
+                face_count=face_count,
+                nodes_per_face=_frozen(nodes_per_face),
+                face_nodes=_frozen(face_nodes.copy()),
+                index_base=index_base,
+            )
+
+        shape = xmi.get_grid_shape(grid, np.empty(rank, dtype=np.int32))
+        if grid_type == "rectilinear":
+            nx, ny = int(shape[-1]), int(shape[-2])
+            nz = int(shape[0])
+        else:
+            # structured quadrilateral
+            nx = ny = nz = int(np.prod(shape))
+        return cls(
+            id=grid,
+            type=grid_type,
+            rank=rank,
+            size=size,
+            x=_frozen(xmi.get_grid_x(grid, np.empty(nx))),
+            y=_frozen(xmi.get_grid_y(grid, np.empty(ny))),
+            z=_get_grid_z(xmi, grid, rank, nz),
+            shape=_frozen(shape),
+        )
+
+    @cached_property
+    def _face_node_csr(self) -> Tuple[NDArray[np.intp], NDArray[np.intp]]:
+        if (
+            self.face_nodes is None
+            or self.nodes_per_face is None
+            or self.node_count is None
+        ):
+            raise InputError(f"Grid {self.id} of type {self.type!r} has no faces")
+        counts = self.nodes_per_face.astype(np.intp)
+        nodes = self.face_nodes.astype(np.intp)
+        if nodes.size == counts.sum() + counts.size:
+            # drop the node closing every face
+            nodes = np.delete(nodes, np.cumsum(counts + 1) - 1)
+        nodes -= self.index_base
+        indptr = np.zeros(counts.size + 1, dtype=np.intp)
+        np.cumsum(counts, out=indptr[1:])
+        return _frozen(indptr), _frozen(nodes)
+
+    @property
+    def indptr(self) -> NDArray[np.intp]:
+        """Offsets of the nodes of every face into `indices`"""
+        return self._face_node_csr[0]
+
+    @property
+    def indices(self) -> NDArray[np.intp]:
+        """Zero-based nodes of all faces, without closing nodes"""
+        return self._face_node_csr[1]
+
+    @cached_property
+    def centroids(self) -> NDArray[np.float64]:
+        """The x and y coordinates of the centroid of every cell
+
+        For unstructured grids the area centroids of the faces, for
+        rectilinear grids the centers of the cells of a single layer,
+        ordered by row and column.
+        """
+        if self.type == "rectilinear":
+            xc = 0.5 * (self.x[:-1] + self.x[1:])
+            yc = 0.5 * (self.y[:-1] + self.y[1:])
+            xx, yy = np.meshgrid(xc, yc)
+            return _frozen(np.column_stack((xx.ravel(), yy.ravel())))
+
+        indptr, nodes = self._face_node_csr
+        counts = np.diff(indptr)
+        face = np.repeat(np.arange(counts.size), counts)
+        following = _following(indptr)
+
+        # coordinates relative to the first node of each face, for accuracy
+        x_ref = np.zeros(counts.size)
+        y_ref = np.zeros(counts.size)
+        x_ref[counts > 0] = self.x[nodes[indptr[:-1][counts > 0]]]
+        y_ref[counts > 0] = self.y[nodes[indptr[:-1][counts > 0]]]
+        x0 = self.x[nodes] - x_ref[face]
+        y0 = self.y[nodes] - y_ref[face]
+        x1, y1 = x0[following], y0[following]
+
+        # shoelace formula, with twice the area
+        cross = x0 * y1 - x1 * y0
+        area = np.bincount(face, cross, minlength=counts.size)
+        cx = np.bincount(face, (x0 + x1) * cross, minlength=counts.size)
+        cy = np.bincount(face, (y0 + y1) * cross, minlength=counts.size)
+
+        # the mean of the nodes for degenerate faces
+        valid = area != 0.0
+        denominator = np.where(valid, 3.0 * area, 1.0)
+        count = np.maximum(counts, 1)
+        mean_x = np.bincount(face, x0, minlength=counts.size) / count
+        mean_y = np.bincount(face, y0, minlength=counts.size) / count
+        centroids = np.column_stack(
+            (
+                x_ref + np.where(valid, cx / denominator, mean_x),
+                y_ref + np.where(valid, cy / denominator, mean_y),
+            )
+        )
+        return _frozen(centroids)
+
+    @cached_property
+    def neighbours(self) -> Tuple[NDArray[np.intp], NDArray[np.intp]]:
+        """CSR adjacency of faces sharing an edge, as (indptr, indices)
+
+        The neighbours of face `i` are `indices[indptr[i]:indptr[i + 1]]`,
+        in increasing order.
+        """
+        indptr, nodes = self._face_node_csr
+        counts = np.diff(indptr)
+        face = np.repeat(np.arange(counts.size), counts)
+        following = _following(indptr)
+
+        # every edge as a single key, independent of its direction
+        a, b = nodes, nodes[following]
+        node_count = np.intp(self.node_count or 0)
+        keys = np.minimum(a, b) * node_count + np.maximum(a, b)
+        order = np.argsort(keys, kind="stable")
+        keys, face = keys[order], face[order]
+        shared = np.flatnonzero(keys[1:] == keys[:-1])
+        first, second = face[shared], face[shared + 1]
+        pairs = first != second
+        rows = np.concatenate((first[pairs], second[pairs]))
+        cols = np.concatenate((second[pairs], first[pairs]))
+
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        unique = np.ones(rows.size, dtype=bool)
+        unique[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols = rows[unique], cols[unique]
+
+        adjacency_indptr = np.zeros(counts.size + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=counts.size), out=adjacency_indptr[1:])
+        return _frozen(adjacency_indptr), _frozen(cols.astype(np.intp))
+
+
+def _following(indptr: NDArray[np.intp]) -> NDArray[np.intp]:
+    """Position of the next node of every face, wrapping around to the first"""
+    following = np.arange(1, indptr[-1] + 1, dtype=np.intp)
+    nonempty = indptr[1:] > indptr[:-1]
+    following[indptr[1:][nonempty] - 1] = indptr[:-1][nonempty]
+    return following
+
+
+def _get_grid_z(
+    xmi: "XmiWrapper", grid: int, rank: int, count: int
+) -> Optional[NDArray[np.float64]]:
+    if rank < 3:
+        return None
+    try:
+        return _frozen(xmi.get_grid_z(grid, np.empty(count)))
+    except XMIError:
+        # not all kernels provide the third dimension
+        return None
@@ -0,0 +1,130 @@
+"""Hooks around the calls of kernel functions."""
+
+__all__ = ["CallHook", "FunctionCall", "LoggingHook", "TimingHook"]
+
+import logging
+from ctypes import c_char_p
+from dataclasses import dataclass
+from logging import Logger
+from typing import Any, Optional, Tuple
+
+from xmipy.timers.report import timer_key
+from xmipy.timers.timer import Timer
+from xmipy.utils import repr_function_call
+
+# kernel functions taking a variable address as first argument
+_VARIABLE_FUNCTIONS = ("get_value", "set_value")
+_VARIABLE_DETAIL = "for variable "
+
+
+@dataclass
+class FunctionCall:
+    """A call of a kernel function, as passed to a `CallHook`
+
+    Attributes
+    ----------
+    name : str
+        The name of the kernel function.
+    args : Tuple
+        The ctypes arguments.
+    detail : str, optional
+        Description of the call, e.g. "for variable SLN_1/X".
+    start_ns : int
+        `time.perf_counter_ns()` right before the kernel function is called.
+    end_ns : int
+        `time.perf_counter_ns()` right after the kernel function returned,
+        0 in `pre_call`.
+    result : int, optional
+        The status returned by the kernel function, None in `pre_call` or
+        when the call raised an exception.
+    nbytes : int
+        The number of bytes copied by the call, 0 if not reported.
+    """
+
+    name: str
+    args: Tuple[Any, ...]
+    detail: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    result: Optional[int] = None
+    nbytes: int = 0
+
+
+class CallHook:
+    """Base class of hooks around every call of a kernel function.
+
+    Register a hook with `XmiWrapper.add_call_hook()`. Hooks are called in
+    order of registration before the call, and in reverse order after it,
+    also when the call fails. Without hooks, timing and debug logging,
+    kernel functions are called without any instrumentation.
+
+    ```
+    class CallCounter(CallHook):
+        def __init__(self):
+            self.counts = collections.Counter()
+
+        def post_call(self, call):
+            self.counts[call.name] += 1
+
+    mf6.add_call_hook(CallCounter())
+    ```
+    """
+
+    def pre_call(self, call: FunctionCall) -> None:
+        """Called before the kernel function"""
+
+    def post_call(self, call: FunctionCall) -> None:
+        """Called after the kernel function"""
+
+
+class TimingHook(CallHook):
+    """Adds the duration of every call to a `Timer`
+
+    While `period` is set, the timings are keyed by function and period,
+    as "update@3", so they can be reported per period. With `by_variable`,
+    the timings of `get_value*` and `set_value*` are keyed by variable as
+    well, as "get_value[SLN_1/X]@3". With `count_bytes`, the bytes copied
+    are added to the timers.
+    """
+
+    def __init__(self, timer: Timer):
+        self.timer = timer
+        self.period: Optional[str] = None
+        self.by_variable = False
+        self.count_bytes = False
+
+    def post_call(self, call: FunctionCall) -> None:
+        variable = self._variable(call) if self.by_variable else None
+        self.timer.add(
+            timer_key(call.name, variable, self.period),
+            (call.end_ns - call.start_ns) * 1e-9,
+            call.nbytes if self.count_bytes else 0,
+        )
+
+    @staticmethod
+    def _variable(call: FunctionCall) -> Optional[str]:
+        if not call.name.startswith(_VARIABLE_FUNCTIONS):
+            return None
+        detail = call.detail
+        if detail is not None and detail.startswith(_VARIABLE_DETAIL):
+            return detail[len(_VARIABLE_DETAIL) :]
+        if call.args and isinstance(call.args[0], c_char_p):
+            name = call.args[0].value
+            if name is not None:
+                return name.decode()
+        return None
+
+
+class LoggingHook(CallHook):
+    """Logs every call with its arguments and status at DEBUG level"""
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    def post_call(self, call: FunctionCall) -> None:
+        if call.result is not None and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "execute function: %s returned %s",
+                repr_function_call(call.name, *call.args),
+                call.result,
+            )
@@ -4,9 +4,19 @@ __all__ = ["get_logger", "show_logger_message"]
 
 import logging
 import sys
+import weakref
 from contextlib import contextmanager
 from logging import Logger
-from typing import Generator, Union
+from typing import Any, Generator, Union
+
+# objects with a `refresh_dispatcher()` method, e.g. every `XmiWrapper`,
+# which select how kernel functions are called by the level of their logger
+_dispatchers: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def _refresh_dispatchers() -> None:
+    for dispatcher in list(_dispatchers):
+        dispatcher.refresh_dispatcher()
 
 
 def get_logger(name: str, level: Union[str, int] = 0) -> Logger:
@@ -43,6 +53,10 @@ def show_logger_message(
 ) -> Generator[None, None, None]:
     """Context manager to show logger messages at and above a given level.
 
+    With level "DEBUG" the logger of an `XmiWrapper` logs its kernel function
+    calls as well, the wrappers select their dispatcher again on entering and
+    leaving the context.
+
     Parameters
     ----------
     logger : Logger
@@ -60,8 +74,12 @@ def show_logger_message(
     toggle_disabled = logger.disabled and ignore_disabled
     if toggle_disabled:
         logger.disabled = False
+    if not_enabled or toggle_disabled:
+        _refresh_dispatchers()
     yield
     if not_enabled:
         logger.setLevel(prev_level)
     if toggle_disabled:
         logger.disabled = True
+    if not_enabled or toggle_disabled:
+        _refresh_dispatchers()
@@ -0,0 +1,247 @@
+"""Registry of pointer views into the memory of a kernel."""
+
+__all__ = ["ChangeTracker", "PointerRegistry"]
+
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+if TYPE_CHECKING:
+    from xmipy.xmiwrapper import XmiWrapper
+
+
+class PointerRegistry:
+    """Cache of `get_value_ptr` views which can be re-validated cheaply.
+
+    The kernel may reallocate its arrays, for instance when boundary packages
+    read a new stress period, which leaves views into the old memory stale.
+    Call `validate()` once per time step to rebind the views whose address or
+    shape has changed, and always access the views through the registry.
+
+    ```
+    In [1]: pointers = PointerRegistry(mf6)
+
+    In [2]: head = pointers["TEST_MODEL_DIS/X"]
+
+    In [3]: mf6.update()
+
+    In [4]: pointers.validate()
+    Out[4]: []
+    ```
+
+    Parameters
+    ----------
+    xmi : XmiWrapper
+        The initialized kernel the views point into.
+    """
+
+    def __init__(self, xmi: "XmiWrapper") -> None:
+        self.xmi = xmi
+        self._views: Dict[str, NDArray[Any]] = {}
+        self._ranks: Dict[str, int] = {}
+
+    def __getitem__(self, name: str) -> NDArray[Any]:
+        return self.register(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._views
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._views)
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def register(self, name: str) -> NDArray[Any]:
+        """Get the view of a variable, creating it on first use"""
+        view = self._views.get(name)
+        if view is None:
+            view = self._bind(name)
+        return view
+
+    def unregister(self, name: str) -> None:
+        """Remove the view of a variable from the registry"""
+        del self._views[name]
+        del self._ranks[name]
+
+    def clear(self) -> None:
+        """Remove all views, required after the kernel has been finalized"""
+        self._views.clear()
+        self._ranks.clear()
+
+    def is_stale(self, name: str) -> bool:
+        """Whether the kernel moved or resized a variable since it was bound"""
+        view = self._views[name]
+        if self.xmi.get_value_ptr_address(name) != view.ctypes.data:
+            return True
+        rank = self._ranks[name]
+        if rank == 0:
+            return False
+        shape = self.xmi._get_var_shape(name, rank)
+        return tuple(np.trim_zeros(shape).tolist()) != view.shape
+
+    def validate(self) -> List[str]:
+        """Rebind all stale views
+
+        Returns
+        -------
+        List[str]
+            The variable addresses which have been rebound.
+        """
+        stale = [name for name in self._views if self.is_stale(name)]
+        for name in stale:
+            self.xmi.clear_var_info(name)
+            self._bind(name)
+        return stale
+
+    def _bind(self, name: str) -> NDArray[Any]:
+        view = self.xmi.get_value_ptr(name)
+        self._views[name] = view
+        self._ranks[name] = self.xmi.get_var_rank(name)
+        return view
+
+
+class ChangeTracker:
+    """Finds the elements of registered views which changed since last sent.
+
+    For every tracked variable a shadow copy holds the values as they were
+    last committed, e.g. sent to a coupled model. `changes()` compares the
+    current values with the shadow in a single vectorized pass, so that
+    only the changed elements need to be exchanged, or nothing at all.
+
+    For very large arrays `block_size` replaces the shadow copy by two
+    checksums per block of elements, the sum and the sum of squares, and
+    all elements of a changed block are reported. This costs far less
+    memory, but may miss changes which cancel out within a block, and NaN
+    or infinite values hide the other changes in their block. The checksums
+    do not scale with the changes of single elements, so blocks are only
+    compared exactly, without tolerance.
+
+    ```
+    tracker = ChangeTracker(PointerRegistry(mf6), atol=1e-6)
+    tracker.track("GWF_1/RIV_0/STAGE")
+    ...
+    changed = tracker.changes("GWF_1/RIV_0/STAGE", commit=True)
+    if changed.size:
+        send(changed, tracker.pointers["GWF_1/RIV_0/STAGE"].flat[changed])
+    ```
+
+    Parameters
+    ----------
+    pointers : PointerRegistry
+        The registry the views are taken from, so that rebound views are
+        compared as well.
+    atol, rtol : float, optional
+        Absolute and relative tolerance, as in `numpy.isclose`, by default
+        only exactly equal values are unchanged. Not supported together
+        with `block_size`.
+    block_size : int, optional
+        Number of elements per checksum, by default a full shadow copy is
+        kept.
+    """
+
+    def __init__(
+        self,
+        pointers: PointerRegistry,
+        atol: float = 0.0,
+        rtol: float = 0.0,
+        block_size: Optional[int] = None,
+    ) -> None:
+        if block_size is not None:
+            if block_size < 1:
+                raise ValueError("Block size should be at least 1")
+            if atol != 0.0 or rtol != 0.0:
+                raise ValueError("Tolerances are not supported with a block size")
+        self.pointers = pointers
+        self.atol = atol
+        self.rtol = rtol
+        self.block_size = block_size
+        self._shadows: Dict[str, NDArray[Any]] = {}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._shadows
+
+    def track(self, name: str) -> None:
+        """Start tracking a variable, with its current values committed"""
+        self._shadows[name] = self._snapshot(name)
+
+    def untrack(self, name: str) -> None:
+        """Stop tracking a variable"""
+        del self._shadows[name]
+
+    def commit(self, name: Optional[str] = None) -> None:
+        """Mark the current values as sent, by default of all variables"""
+        names = list(self._shadows) if name is None else [name]
+        for tracked in names:
+            self._shadows[tracked] = self._snapshot(tracked)
+
+    def changed(self, name: str) -> bool:
+        """Whether any element changed beyond the tolerance"""
+        return bool(self.changes(name).size)
+
+    def changes(self, name: str, commit: bool = False) -> NDArray[np.intp]:
+        """Flat indices of the elements changed since the last commit
+
+        Parameters
+        ----------
+        name : str
+            The variable address.
+        commit : bool, optional
+            Whether the changed elements are committed right away, by
+            default False. Elements within the tolerance are not, so slow
+            drifts are still detected once they exceed the tolerance.
+        """
+        values = self.pointers[name].reshape(-1)
+        shadow = self._shadows[name]
+        block_size = self.block_size
+        if block_size is None:
+            if values.shape != shadow.shape:
+                # the kernel resized the variable
+                changed = np.arange(values.size, dtype=np.intp)
+                if commit:
+                    self._shadows[name] = values.copy()
+                return changed
+            changed = np.flatnonzero(self._differ(values, shadow))
+            if commit:
+                shadow[changed] = values[changed]
+            return changed
+
+        checksums = _checksums(values, block_size)
+        if checksums.shape != shadow.shape:
+            changed = np.arange(values.size, dtype=np.intp)
+            if commit:
+                self._shadows[name] = checksums
+            return changed
+        blocks = np.any(self._differ(checksums, shadow), axis=0)
+        if commit:
+            shadow[:, blocks] = checksums[:, blocks]
+        return np.flatnonzero(np.repeat(blocks, block_size)[: values.size])
+
+    def _differ(self, values: NDArray[Any], shadow: NDArray[Any]) -> NDArray[np.bool_]:
+        if self.atol == 0.0 and self.rtol == 0.0:
+            differ: NDArray[np.bool_] = values != shadow
+            if values.dtype.kind == "f":
+                differ &= ~(np.isnan(values) & np.isnan(shadow))
+            return differ
+        close: NDArray[np.bool_] = np.isclose(
+            values, shadow, self.rtol, self.atol, equal_nan=True
+        )
+        return ~close
+
+    def _snapshot(self, name: str) -> NDArray[Any]:
+        values = self.pointers[name].reshape(-1)
+        if self.block_size is None:
+            return values.copy()
+        return _checksums(values, self.block_size)
+
+
+def _checksums(values: NDArray[Any], block_size: int) -> NDArray[np.float64]:
+    """The sum and the sum of squares of every block of values"""
+    if values.size == 0:
+        return np.zeros((2, 0))
+    starts = np.arange(0, values.size, block_size)
+    values = values.astype(np.float64, copy=False)
+    return np.stack(
+        (np.add.reduceat(values, starts), np.add.reduceat(values * values, starts))
+    )
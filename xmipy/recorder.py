@@ -0,0 +1,206 @@
+"""Record variables of a kernel to disk while it runs."""
+
+__all__ = ["Recorder", "load_recording"]
+
+import queue
+import threading
+from os import PathLike
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Iterable, List, Optional, Tuple, Type, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from xmipy.errors import InputError
+from xmipy.pointers import PointerRegistry
+from xmipy.xmiwrapper import XmiWrapper
+
+_TIMES = "times"
+
+
+class Recorder:
+    """Streams snapshots of variables to chunked .npy files.
+
+    Every `record()` copies the pointer views of the variables, together
+    with the current time, into a staging buffer. The views are validated
+    first, so variables the kernel reallocated, e.g. boundary packages at a
+    new stress period, are read from their new memory. Their shape must stay
+    the same. Full buffers are written by a background thread while the
+    kernel continues in a second buffer, so the time loop only waits for
+    disk I/O when writing falls a whole chunk behind. Memory use is bounded
+    by two chunks, regardless of the length of the run.
+
+    For every variable address, e.g. "TEST_MODEL/X", the chunks are written
+    to "<directory>/TEST_MODEL/X/00000.npy", "00001.npy" and so on, with the
+    time of every snapshot in "<directory>/times/". Use `load_recording` to
+    read them back.
+
+    ```
+    mf6.initialize()
+    with Recorder(mf6, ["TEST_MODEL/X"], "output") as recorder:
+        Simulation(mf6, post_step=[lambda sim: recorder.record()]).run()
+    times, heads = load_recording("output", "TEST_MODEL/X")
+    ```
+
+    Parameters
+    ----------
+    xmi : XmiWrapper
+        The initialized kernel.
+    names : Iterable[str]
+        Addresses of the numeric variables to record.
+    directory : Union[str, PathLike]
+        The directory to write to, created if needed.
+    chunk_size : int, optional
+        The number of snapshots per file, by default 64.
+    pointers : PointerRegistry, optional
+        The registry to take the views from, by default a new one.
+    """
+
+    def __init__(
+        self,
+        xmi: XmiWrapper,
+        names: Iterable[str],
+        directory: Union[str, PathLike[Any]],
+        chunk_size: int = 64,
+        pointers: Optional[PointerRegistry] = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("Chunk size should be at least 1")
+        self.xmi = xmi
+        self.names = list(names)
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.pointers = PointerRegistry(xmi) if pointers is None else pointers
+        views = [self.pointers[name] for name in self.names]
+
+        paths = [self.directory / _TIMES]
+        paths += [self.directory / name for name in self.names]
+        for path in paths:
+            path.mkdir(parents=True, exist_ok=True)
+        self._paths = paths
+
+        # two sets of staging buffers, the times first
+        self._free: "queue.Queue[List[NDArray[Any]]]" = queue.Queue()
+        for _ in range(2):
+            buffers = [np.empty(chunk_size, dtype=np.float64)]
+            buffers += [
+                np.empty((chunk_size, *view.shape), dtype=view.dtype) for view in views
+            ]
+            self._free.put(buffers)
+        self._full: "queue.Queue[Optional[Tuple[int, int, List[NDArray[Any]]]]]" = (
+            queue.Queue()
+        )
+        self._buffers = self._free.get()
+        self._row = 0
+        self._chunk = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        self._writer = threading.Thread(
+            target=self._write, name="xmipy-recorder", daemon=True
+        )
+        self._writer.start()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def record(self, time: Optional[float] = None) -> None:
+        """Take a snapshot of all variables
+
+        Parameters
+        ----------
+        time : float, optional
+            The time of the snapshot, by default the current time of the kernel.
+        """
+        if self._closed:
+            raise RuntimeError("Recorder is closed")
+        if self._error is not None:
+            raise self._error
+        if time is None:
+            time = self.xmi.get_current_time()
+        self.pointers.validate()
+        buffers = self._buffers
+        views = [self.pointers[name] for name in self.names]
+        for name, buffer, view in zip(self.names, buffers[1:], views):
+            if view.shape != buffer.shape[1:]:
+                raise InputError(
+                    f"Shape of {name} changed from {buffer.shape[1:]} to "
+                    f"{view.shape}, which cannot be recorded"
+                )
+        row = self._row
+        buffers[0][row] = time
+        for buffer, view in zip(buffers[1:], views):
+            buffer[row] = view
+        self._row = row + 1
+        if self._row == self.chunk_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._full.put((self._chunk, self._row, self._buffers))
+        self._chunk += 1
+        self._row = 0
+        # only waits when the writer is still busy with the other buffer
+        self._buffers = self._free.get()
+
+    def close(self) -> None:
+        """Write the remaining snapshots and wait for the writer to finish"""
+        if self._closed:
+            return
+        if self._row:
+            self._flush()
+        self._closed = True
+        self._full.put(None)
+        self._writer.join()
+        if self._error is not None:
+            raise self._error
+
+    def _write(self) -> None:
+        while True:
+            item = self._full.get()
+            if item is None:
+                return
+            chunk, rows, buffers = item
+            if self._error is None:
+                try:
+                    for path, buffer in zip(self._paths, buffers):
+                        np.save(path / f"{chunk:05d}.npy", buffer[:rows])
+                except BaseException as error:
+                    self._error = error
+            self._free.put(buffers)
+
+
+def load_recording(
+    directory: Union[str, PathLike[Any]], name: str
+) -> Tuple[NDArray[np.float64], NDArray[Any]]:
+    """Read the times and values of a variable written by a `Recorder`
+
+    Parameters
+    ----------
+    directory : Union[str, PathLike]
+        The directory of the recorder.
+    name : str
+        The variable address.
+
+    Returns
+    -------
+    Tuple[NDArray, NDArray]
+        The times, and the values with the snapshots along the first axis.
+    """
+    directory = Path(directory)
+
+    def load(path: Path) -> NDArray[Any]:
+        chunks = sorted(path.glob("*.npy"))
+        if not chunks:
+            raise FileNotFoundError(f"No recording found in {path}")
+        return np.concatenate([np.load(chunk) for chunk in chunks])
+
+    return load(directory / _TIMES), load(directory / name)
@@ -0,0 +1,174 @@
+"""Drive the time loop of a kernel through the XMI."""
+
+__all__ = ["Simulation"]
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from numpy.typing import NDArray
+
+from xmipy.xmiwrapper import XmiWrapper
+
+StepHook = Callable[["Simulation"], None]
+PreIterationHook = Callable[["Simulation", int, int], None]
+PostIterationHook = Callable[["Simulation", int, int, bool], None]
+
+
+class Simulation:
+    """Time loop over the solutions of a kernel, with hooks for coupling.
+
+    Every time step runs `prepare_time_step`, then for each solution
+    `prepare_solve`, `solve` until convergence or the maximum number of
+    iterations and `finalize_solve`, and finally `finalize_time_step`.
+    The maximum number of iterations is read from a pointer into the kernel
+    which is resolved once, so changes by coupled code are picked up. The
+    working directory is entered once for the whole run.
+
+    Hooks are called with the simulation as first argument:
+
+    - `pre_step(simulation)` before `prepare_time_step`,
+    - `post_step(simulation)` after `finalize_time_step`,
+    - `pre_iteration(simulation, component_id, iteration)` before `solve`,
+    - `post_iteration(simulation, component_id, iteration, has_converged)`
+      after `solve`, with iterations counted from 1.
+
+    Without iteration hooks the iteration loop makes no other Python calls
+    than to `solve`.
+
+    ```
+    def exchange(sim, component_id, iteration):
+        ...
+
+    mf6.initialize()
+    sim = Simulation(mf6, pre_iteration=[exchange])
+    sim.run()
+    print(sim.iterations)
+    mf6.finalize()
+    ```
+
+    Parameters
+    ----------
+    xmi : XmiWrapper
+        The initialized kernel.
+    pre_step, post_step : List[Callable], optional
+        Hooks called around every time step.
+    pre_iteration, post_iteration : List[Callable], optional
+        Hooks called around every call to `solve`.
+
+    Attributes
+    ----------
+    times : List[float]
+        The model time at the end of every time step.
+    iterations : List[Tuple[int, ...]]
+        The number of iterations of every solution for every time step.
+    converged : List[bool]
+        Whether all solutions converged for every time step.
+    """
+
+    def __init__(
+        self,
+        xmi: XmiWrapper,
+        pre_step: Optional[List[StepHook]] = None,
+        post_step: Optional[List[StepHook]] = None,
+        pre_iteration: Optional[List[PreIterationHook]] = None,
+        post_iteration: Optional[List[PostIterationHook]] = None,
+    ):
+        self.xmi = xmi
+        self.pre_step = pre_step if pre_step is not None else []
+        self.post_step = post_step if post_step is not None else []
+        self.pre_iteration = pre_iteration if pre_iteration is not None else []
+        self.post_iteration = post_iteration if post_iteration is not None else []
+        self.times: List[float] = []
+        self.iterations: List[Tuple[int, ...]] = []
+        self.converged: List[bool] = []
+        self._max_iterations: List[NDArray[Any]] = []
+
+    @property
+    def subcomponent_count(self) -> int:
+        """The number of solutions"""
+        if not self._max_iterations:
+            self._resolve_max_iterations()
+        return len(self._max_iterations)
+
+    def _resolve_max_iterations(self) -> None:
+        xmi = self.xmi
+        self._max_iterations = [
+            xmi.get_value_ptr(xmi.get_var_address("MXITER", f"SLN_{component_id}"))
+            for component_id in range(1, xmi.get_subcomponent_count() + 1)
+        ]
+
+    def run(self, end_time: Optional[float] = None) -> None:
+        """Run time steps until the end time
+
+        Parameters
+        ----------
+        end_time : float, optional
+            Model time to run until, by default the end time of the kernel.
+        """
+        xmi = self.xmi
+        with xmi.session():
+            if end_time is None:
+                end_time = xmi.get_end_time()
+            while xmi.get_current_time() < end_time:
+                self.step()
+
+    def step(self) -> None:
+        """Run a single time step"""
+        xmi = self.xmi
+        with xmi.session():
+            if not self._max_iterations:
+                self._resolve_max_iterations()
+            for hook in self.pre_step:
+                hook(self)
+
+            xmi.prepare_time_step(xmi.get_time_step())
+            iterations = []
+            all_converged = True
+            for component_id, max_iterations in enumerate(self._max_iterations, 1):
+                xmi.prepare_solve(component_id)
+                if self.pre_iteration or self.post_iteration:
+                    iteration, has_converged = self._solve_with_hooks(
+                        component_id, int(max_iterations[0])
+                    )
+                else:
+                    iteration, has_converged = _solve(
+                        xmi.solve, component_id, int(max_iterations[0])
+                    )
+                xmi.finalize_solve(component_id)
+                iterations.append(iteration)
+                all_converged = all_converged and has_converged
+            xmi.finalize_time_step()
+
+            self.times.append(xmi.get_current_time())
+            self.iterations.append(tuple(iterations))
+            self.converged.append(all_converged)
+            for hook in self.post_step:
+                hook(self)
+
+    def _solve_with_hooks(
+        self, component_id: int, max_iterations: int
+    ) -> Tuple[int, bool]:
+        solve = self.xmi.solve
+        pre_iteration = tuple(self.pre_iteration)
+        post_iteration = tuple(self.post_iteration)
+        has_converged = False
+        iteration = 0
+        while iteration < max_iterations:
+            for pre_hook in pre_iteration:
+                pre_hook(self, component_id, iteration + 1)
+            has_converged = solve(component_id)
+            iteration += 1
+            for post_hook in post_iteration:
+                post_hook(self, component_id, iteration, has_converged)
+            if has_converged:
+                break
+        return iteration, has_converged
+
+
+def _solve(
+    solve: Callable[[int], bool], component_id: int, max_iterations: int
+) -> Tuple[int, bool]:
+    """Iterate until convergence, returning the number of iterations"""
+    for iteration in range(1, max_iterations + 1):
+        if solve(component_id):
+            return iteration, True
+    return max_iterations, False
@@ -0,0 +1,175 @@
+"""Structured report of timings of kernel functions."""
+
+__all__ = ["TimingReport", "TimingRow", "parse_timer_key", "timer_key"]
+
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from xmipy.timers.timers import Statistics, Timers
+
+_TIMER_KEY = re.compile(
+    r"^(?P<function>[^\[@]*)(?:\[(?P<variable>[^\]]*)\])?(?:@(?P<period>.*))?$"
+)
+
+_COLUMNS = ("count", "total", "mean", "p50", "p95", "p99", "max", "share")
+_BYTE_COLUMNS = ("MB", "MB/s")
+
+
+def timer_key(
+    function: str, variable: Optional[str] = None, period: Optional[str] = None
+) -> str:
+    """Key of a timer, e.g. "get_value[SLN_1/X]@2" """
+    key = function
+    if variable is not None:
+        key += f"[{variable}]"
+    if period is not None:
+        key += f"@{period}"
+    return key
+
+
+def parse_timer_key(key: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Split the key of a timer into function, variable and period"""
+    match = _TIMER_KEY.match(key)
+    if match is None:
+        return key, None, None
+    return match["function"], match["variable"], match["period"]
+
+
+@dataclass
+class TimingRow:
+    """Latency statistics of a kernel function, in seconds
+
+    `variable` and `period` are only set when the report is grouped by
+    them. `share` is the fraction of the total time of all functions.
+    `nbytes` is the number of bytes copied, if counted, and `throughput`
+    the bytes copied per second of the function, in MB/s.
+    """
+
+    function: str
+    variable: Optional[str]
+    period: Optional[str]
+    count: int
+    total: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    share: float
+    nbytes: int = 0
+    throughput: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return timer_key(self.function, self.variable, self.period)
+
+
+class TimingReport(float):
+    """Timing statistics per kernel function, which is a float itself.
+
+    Its value is the total time of all functions, as returned by
+    `report_timing_totals()` before the report was introduced.
+
+    ```
+    report = mf6.report_timing_totals()
+    print(report.table())
+    report.to_dict()["update"]["p95"]
+    ```
+
+    Attributes
+    ----------
+    rows : List[TimingRow]
+        The statistics, sorted by decreasing total time.
+    """
+
+    rows: List[TimingRow]
+
+    def __new__(cls, rows: List[TimingRow], total: float) -> "TimingReport":
+        report = super().__new__(cls, total)
+        report.rows = rows
+        return report
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return self.__class__, (self.rows, float(self))
+
+    @classmethod
+    def from_timers(
+        cls, timers: Timers, group_by: Optional[str] = None
+    ) -> "TimingReport":
+        """Summarize timers, keyed as by `timer_key`
+
+        Parameters
+        ----------
+        timers : Timers
+            The timings.
+        group_by : str, optional
+            "variable" or "period" to report every variable or period of a
+            function separately, where the timers have been split by them.
+            By default the statistics are given per function.
+        """
+        if group_by not in (None, "variable", "period"):
+            raise ValueError(f"Cannot group timings by {group_by!r}")
+        groups: Dict[Tuple[str, Optional[str], Optional[str]], Statistics] = {}
+        for key in timers:
+            function, variable, period = parse_timer_key(key)
+            group = (
+                function,
+                variable if group_by == "variable" else None,
+                period if group_by == "period" else None,
+            )
+            stats = groups.get(group)
+            if stats is None:
+                stats = groups[group] = Statistics()
+            stats.merge(timers.statistics(key))
+
+        total = sum(stats.total for stats in groups.values())
+        rows = [
+            TimingRow(
+                function=function,
+                variable=variable,
+                period=period,
+                count=stats.count,
+                total=stats.total,
+                mean=stats.mean,
+                p50=stats.percentile(50),
+                p95=stats.percentile(95),
+                p99=stats.percentile(99),
+                max=stats.max,
+                share=stats.total / total if total > 0.0 else 0.0,
+                nbytes=stats.nbytes,
+                throughput=(
+                    stats.nbytes / stats.total * 1e-6 if stats.total > 0.0 else 0.0
+                ),
+            )
+            for (function, variable, period), stats in groups.items()
+        ]
+        rows.sort(key=lambda row: row.total, reverse=True)
+        return cls(rows, total)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """The statistics by function, or by timer key when grouped"""
+        return {row.name: asdict(row) for row in self.rows}
+
+    def table(self) -> str:
+        """The statistics as a text table, with times in milliseconds
+
+        The megabytes copied and the throughput are added when bytes have
+        been counted.
+        """
+        names = [row.name for row in self.rows]
+        width = max([len("function"), *map(len, names)])
+        count_bytes = any(row.nbytes for row in self.rows)
+        columns = _COLUMNS + _BYTE_COLUMNS if count_bytes else _COLUMNS
+        lines = [f"{'function':<{width}} " + " ".join(f"{c:>10}" for c in columns)]
+        for name, row in zip(names, self.rows):
+            values = [f"{row.count:>10d}"]
+            values += [
+                f"{1000 * getattr(row, column):>10.3f}" for column in _COLUMNS[1:-1]
+            ]
+            values.append(f"{row.share:>10.1%}")
+            if count_bytes:
+                values.append(f"{row.nbytes * 1e-6:>10.3f}")
+                values.append(f"{row.throughput:>10.1f}")
+            lines.append(f"{name:<{width}} " + " ".join(values))
+        return "\n".join(lines)
@@ -3,9 +3,12 @@
 Adapted from https://pypi.org/project/codetiming/.
 """
 
+import contextvars
 import logging
 import math
+import threading
 import time
+from typing import List, Tuple
 
 from xmipy.errors import TimerError
 from xmipy.timers.timers import Timers
@@ -14,52 +17,92 @@ logger = logging.getLogger(__name__)
 
 
 class Timer:
-    """Time your code using a class, context manager, or decorator"""
+    """Time your code using a class, context manager, or decorator
 
-    def __init__(self, name: str, text: str):
+    Timers may be started again before they are stopped, for nested calls,
+    and from several threads or asyncio tasks at once. Every thread and task
+    has its own stack of running timers, and every thread aggregates into its
+    own `Timers`, so that timing only takes a lock other threads contend
+    for while the timings are combined.
+    """
+
+    def __init__(self, name: str, text: str, keep_samples: bool = False):
         self.name = name
-        self.timers = Timers()
-        self._start_time: dict[str, float] = {}
         self.text = text
         self.last = math.nan
+        self.keep_samples = keep_samples
+        self._start_times: contextvars.ContextVar[Tuple[Tuple[str, float], ...]] = (
+            contextvars.ContextVar(f"{name}_start_times", default=())
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_timers: List[Timers] = []
+
+    @property
+    def timers(self) -> Timers:
+        """The timings of all threads combined"""
+        timers = Timers(keep_samples=self.keep_samples)
+        with self._lock:
+            for thread_timers in self._thread_timers:
+                timers.merge(thread_timers)
+        return timers
+
+    def clear(self) -> None:
+        """Clear the timings of all threads"""
+        with self._lock:
+            for thread_timers in self._thread_timers:
+                thread_timers.clear()
+
+    def _local_timers(self) -> Timers:
+        try:
+            timers: Timers = self._local.timers
+        except AttributeError:
+            timers = self._local.timers = Timers(keep_samples=self.keep_samples)
+            with self._lock:
+                self._thread_timers.append(timers)
+        return timers
 
     def start(self, fn_name: str) -> None:
         """Start a new timer"""
-        if fn_name in self._start_time:
-            raise TimerError(
-                f"Timer for {fn_name} is already running. Use .stop() to stop it"
-            )
-
-        self._start_time[fn_name] = time.perf_counter()
+        start_times = self._start_times.get()
+        self._start_times.set((*start_times, (fn_name, time.perf_counter())))
 
     def stop(self, fn_name: str) -> float:
-        """Stop the timer, and report the elapsed time"""
-        if fn_name not in self._start_time:
+        """Stop the timer last started for `fn_name`, and report the elapsed time"""
+        stop_time = time.perf_counter()
+        start_times = self._start_times.get()
+        for index in range(len(start_times) - 1, -1, -1):
+            if start_times[index][0] == fn_name:
+                break
+        else:
             raise TimerError(
                 f"Timer for {fn_name} is not running yet. Use .start() to start it"
             )
 
         # Calculate elapsed time
-        self.last = time.perf_counter() - self._start_time[fn_name]
-        del self._start_time[fn_name]
-
-        # Report elapsed time
-        attributes = {
-            "name": self.name,
-            "fn_name": fn_name,
-            "milliseconds": self.last * 1000,
-            "seconds": self.last,
-            "minutes": self.last / 60,
-        }
-        logger.debug(self.text.format(self.last, **attributes))
-        self.timers.add(fn_name, self.last)
-
-        return self.last
+        self._start_times.set(start_times[:index] + start_times[index + 1 :])
+        return self.add(fn_name, stop_time - start_times[index][1])
+
+    def add(self, fn_name: str, seconds: float, nbytes: int = 0) -> float:
+        """Add a duration measured elsewhere, and report it"""
+        self.last = seconds
+        if logger.isEnabledFor(logging.DEBUG):
+            attributes = {
+                "name": self.name,
+                "fn_name": fn_name,
+                "milliseconds": seconds * 1000,
+                "seconds": seconds,
+                "minutes": seconds / 60,
+            }
+            logger.debug(self.text.format(seconds, **attributes))
+        self._local_timers().add(fn_name, seconds, nbytes)
+        return seconds
 
     def report_totals(self) -> float:
+        timers = self.timers
         totals = {}
-        for fn_name in self.timers:
-            totals[fn_name] = self.timers.total(fn_name)
+        for fn_name in timers:
+            totals[fn_name] = timers.total(fn_name)
 
         total = 0.0
         for fn_name, seconds in sorted(totals.items(), key=lambda item: item[1]):
@@ -1,37 +1,165 @@
 """Dictionary-like structure with information about timers.
-Directly copied from https://pypi.org/project/codetiming/"""
+Adapted from https://pypi.org/project/codetiming/"""
 
 # Standard library imports
 import collections
 import math
 import statistics
+import threading
 from typing import TYPE_CHECKING, Any, Callable, Dict, List
 
+from xmipy.errors import TimerError
+
 # Annotate generic UserDict
 if TYPE_CHECKING:
     UserDict = collections.UserDict[str, float]  # pragma: no cover
 else:
     UserDict = collections.UserDict
 
+# Logarithmic histogram buckets, each 2**(1/8) (about 9%) wider than the
+# previous one, covering 1 nanosecond up to about 3 hours
+_BUCKET_MIN = 1e-9
+_BUCKET_GROWTH = 2 ** (1 / 8)
+_BUCKET_COUNT = 348
+_LOG_BUCKET_GROWTH = math.log(_BUCKET_GROWTH)
+
+
+class Statistics:
+    """Streaming statistics of the timings of a single timer
+
+    Memory use is constant: next to the count, sum, minimum and maximum, the
+    mean and variance are updated with Welford's algorithm and percentiles
+    are estimated from a fixed-size logarithmic histogram. `nbytes` counts
+    the bytes transferred by the timed calls, if reported.
+    """
+
+    __slots__ = ("_buckets", "_m2", "count", "max", "mean", "min", "nbytes", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._buckets = [0] * _BUCKET_COUNT
+        self.nbytes = 0
+
+    def add(self, value: float) -> None:
+        """Add a timing value"""
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self._buckets[_bucket(value)] += 1
+
+    def merge(self, other: "Statistics") -> None:
+        """Add the timings of other statistics"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta**2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.nbytes += other.nbytes
+        for index, bucket_count in enumerate(other._buckets):
+            if bucket_count:
+                self._buckets[index] += bucket_count
+
+    def stdev(self) -> float:
+        """Sample standard deviation, NaN for less than two timings"""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    def percentile(self, q: float) -> float:
+        """Estimate of the q-th percentile, with q between 0 and 100
+
+        The estimate is accurate within the width of a histogram bucket.
+        """
+        if not 0 <= q <= 100:
+            raise ValueError("Percentile should be between 0 and 100")
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulative = 0
+        for index, count in enumerate(self._buckets):
+            cumulative += count
+            if count and cumulative >= rank:
+                # geometric center of the bucket
+                value: float = _BUCKET_MIN * _BUCKET_GROWTH ** (index + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+def _bucket(value: float) -> int:
+    if value <= _BUCKET_MIN:
+        return 0
+    index = int(math.log(value / _BUCKET_MIN) / _LOG_BUCKET_GROWTH)
+    return min(index, _BUCKET_COUNT - 1)
+
 
 class Timers(UserDict):
-    """Custom dictionary that stores information about timers"""
+    """Custom dictionary that stores information about timers
+
+    Statistics are streamed so memory does not grow with the number of
+    timings. With `keep_samples` all timings are kept as well, which makes
+    `apply` available and `median` exact.
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        """Add a private dictionary keeping track of all timings"""
+    Adding and clearing hold a lock, which is uncontended as long as a
+    single thread adds timings, so that another thread can `merge` these
+    timers while they are being updated.
+    """
+
+    def __init__(self, *args: Any, keep_samples: bool = False, **kwargs: Any) -> None:
+        """Add private dictionaries keeping track of all timings"""
         super().__init__(*args, **kwargs)
+        self.keep_samples = keep_samples
+        self._statistics: Dict[str, Statistics] = {}
         self._timings: Dict[str, List[float]] = collections.defaultdict(list)
-
-    def add(self, name: str, value: float) -> None:
-        """Add a timing value to the given timer"""
-        self._timings[name].append(value)
-        self.data.setdefault(name, 0)
-        self.data[name] += value
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float, nbytes: int = 0) -> None:
+        """Add a timing value, and the bytes transferred, to the given timer"""
+        with self._lock:
+            stats = self._statistics.get(name)
+            if stats is None:
+                stats = self._statistics[name] = Statistics()
+            stats.add(value)
+            stats.nbytes += nbytes
+            if self.keep_samples:
+                self._timings[name].append(value)
+            self.data.setdefault(name, 0)
+            self.data[name] += value
+
+    def merge(self, other: "Timers") -> None:
+        """Add the timings of other timers"""
+        with other._lock:
+            for name, other_stats in other._statistics.items():
+                stats = self._statistics.get(name)
+                if stats is None:
+                    stats = self._statistics[name] = Statistics()
+                stats.merge(other_stats)
+                self.data[name] = self.data.get(name, 0) + other.data[name]
+            if self.keep_samples:
+                for name, timings in other._timings.items():
+                    self._timings[name].extend(timings)
 
     def clear(self) -> None:
         """Clear timers"""
-        self.data.clear()
-        self._timings.clear()
+        with self._lock:
+            self.data.clear()
+            self._statistics.clear()
+            self._timings.clear()
 
     def __setitem__(self, name: str, value: float) -> None:
         """Disallow setting of timer values"""
@@ -40,39 +168,54 @@ class Timers(UserDict):
             "Use '.add()' to update values."
         )
 
+    def statistics(self, name: str) -> Statistics:
+        """Streaming statistics of one named timer"""
+        if name in self._statistics:
+            return self._statistics[name]
+        raise KeyError(name)
+
     def apply(self, func: Callable[[List[float]], float], name: str) -> float:
         """Apply a function to the results of one named timer"""
+        if not self.keep_samples:
+            raise TimerError("Timings are not kept, create Timers(keep_samples=True)")
         if name in self._timings:
             return func(self._timings[name])
         raise KeyError(name)
 
     def count(self, name: str) -> float:
         """Number of timings"""
-        return self.apply(len, name=name)
+        return self.statistics(name).count
 
     def total(self, name: str) -> float:
         """Total time for timers"""
-        return self.apply(sum, name=name)
+        return self.statistics(name).total
 
     def min(self, name: str) -> float:
         """Minimal value of timings"""
-        return self.apply(lambda values: min(values or [0]), name=name)
+        return self.statistics(name).min
 
     def max(self, name: str) -> float:
         """Maximal value of timings"""
-        return self.apply(lambda values: max(values or [0]), name=name)
+        return self.statistics(name).max
 
     def mean(self, name: str) -> float:
         """Mean value of timings"""
-        return self.apply(lambda values: statistics.mean(values or [0]), name=name)
+        return self.statistics(name).mean
 
     def median(self, name: str) -> float:
-        """Median value of timings"""
-        return self.apply(lambda values: statistics.median(values or [0]), name=name)
+        """Median value of timings, estimated unless samples are kept"""
+        if self.keep_samples:
+            return self.apply(statistics.median, name=name)
+        return self.statistics(name).percentile(50)
+
+    def percentile(self, name: str, q: float) -> float:
+        """Estimate of the q-th percentile of timings"""
+        return self.statistics(name).percentile(q)
 
     def stdev(self, name: str) -> float:
         """Standard deviation of timings"""
-        if name in self._timings:
-            value = self._timings[name]
-            return statistics.stdev(value) if len(value) >= 2 else math.nan
-        raise KeyError(name)
+        return self.statistics(name).stdev()
+
+    def nbytes(self, name: str) -> int:
+        """Number of bytes transferred"""
+        return self.statistics(name).nbytes
@@ -0,0 +1,236 @@
+"""Timeline of kernel calls in the Chrome trace format."""
+
+__all__ = ["TraceRecorder"]
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Generator, List, Optional, Union
+
+import numpy as np
+
+from xmipy.hooks import CallHook, FunctionCall
+
+if TYPE_CHECKING:
+    from xmipy.xmiwrapper import XmiWrapper
+
+_EVENT = np.dtype(
+    [
+        ("start", np.int64),
+        ("end", np.int64),
+        ("thread", np.int64),
+        ("name", np.int32),
+        ("model", np.int32),
+        ("detail", np.int32),
+    ]
+)
+
+
+class TraceRecorder:
+    """Records kernel calls in a ring buffer, for export as a Chrome trace.
+
+    The buffer is preallocated and holds the last `capacity` events, so
+    tracing can stay on for a whole run with bounded memory. Every event
+    holds its begin and end time, the thread, the model and the call detail,
+    e.g. the variable of `get_value`. The names, models and details are
+    stored once in a table of strings, from which a string is dropped when
+    the last event using it is overwritten or cleared. The exported JSON can
+    be opened in https://ui.perfetto.dev or chrome://tracing.
+
+    ```
+    recorder = TraceRecorder()
+    recorder.attach(gwf, "gwf")
+    recorder.attach(gwt, "gwt")
+    ... # run the coupled models
+    with recorder.span("exchange"):
+        ...
+    recorder.write("trace.json")
+    ```
+
+    Parameters
+    ----------
+    capacity : int, optional
+        The maximum number of events kept, by default 1_000_000 (36 MB).
+    """
+
+    def __init__(self, capacity: int = 1_000_000):
+        if capacity < 1:
+            raise ValueError("Capacity should be at least 1")
+        self.capacity = capacity
+        self._events = np.zeros(capacity, dtype=_EVENT)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._clear_strings()
+        self._hooks: Dict[int, _TraceHook] = {}
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def dropped(self) -> int:
+        """The number of events overwritten by newer ones"""
+        return max(self._count - self.capacity, 0)
+
+    def attach(self, xmi: "XmiWrapper", model: Optional[str] = None) -> None:
+        """Record the kernel calls of a model
+
+        Parameters
+        ----------
+        xmi : XmiWrapper
+            The model.
+        model : str, optional
+            Name of the model in the trace, by default the library name.
+        """
+        hook = _TraceHook(self, model or xmi.libname)
+        self._hooks[id(xmi)] = hook
+        xmi.add_call_hook(hook)
+
+    def detach(self, xmi: "XmiWrapper") -> None:
+        """Stop recording the kernel calls of a model"""
+        xmi.remove_call_hook(self._hooks.pop(id(xmi)))
+
+    def record(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        model: str = "",
+        detail: Optional[str] = None,
+    ) -> None:
+        """Record an event, with `time.perf_counter_ns()` timestamps"""
+        self._record(name, start_ns, end_ns, model, detail)
+
+    @contextmanager
+    def span(
+        self, name: str, model: str = "", detail: Optional[str] = None
+    ) -> Generator[None, None, None]:
+        """Context manager recording an event, e.g. for a time step"""
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start_ns, time.perf_counter_ns(), model, detail)
+
+    def clear(self) -> None:
+        """Remove all events"""
+        with self._lock:
+            self._count = 0
+            self._clear_strings()
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """The events, oldest first, in the Chrome trace event format"""
+        with self._lock:
+            count = self._count
+            if count > self.capacity:
+                oldest = count % self.capacity
+                events = np.concatenate((self._events[oldest:], self._events[:oldest]))
+            else:
+                events = self._events[:count].copy()
+            strings = list(self._strings)
+
+        pid = os.getpid()
+        trace_events = [
+            {
+                "name": strings[event["name"]],
+                "cat": strings[event["model"]],
+                "ph": "X",
+                "ts": int(event["start"]) / 1000,
+                "dur": int(event["end"] - event["start"]) / 1000,
+                "pid": pid,
+                "tid": int(event["thread"]),
+                "args": (
+                    {
+                        "model": strings[event["model"]],
+                        "detail": strings[event["detail"]],
+                    }
+                    if event["detail"]
+                    else {"model": strings[event["model"]]}
+                ),
+            }
+            for event in events
+        ]
+        return {
+            "traceEvents": trace_events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+
+    def write(self, path: Union[str, PathLike[Any]]) -> None:
+        """Write the events as a Chrome trace JSON file"""
+        with Path(path).open("w") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+    def _clear_strings(self) -> None:
+        # the empty string has id 0 and is never dropped
+        self._strings: List[str] = [""]
+        self._string_ids: Dict[str, int] = {"": 0}
+        # the number of events using every string, and the ids of dropped ones
+        self._string_refs: List[int] = [0]
+        self._free_ids: List[int] = []
+
+    def _acquire_string(self, string: str) -> int:
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            if self._free_ids:
+                string_id = self._free_ids.pop()
+                self._strings[string_id] = string
+            else:
+                string_id = len(self._strings)
+                self._strings.append(string)
+                self._string_refs.append(0)
+            self._string_ids[string] = string_id
+        self._string_refs[string_id] += 1
+        return string_id
+
+    def _release_string(self, string_id: int) -> None:
+        if string_id == 0:
+            return
+        self._string_refs[string_id] -= 1
+        if self._string_refs[string_id] == 0:
+            del self._string_ids[self._strings[string_id]]
+            self._strings[string_id] = ""
+            self._free_ids.append(string_id)
+
+    def _record(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        model: str,
+        detail: Optional[str],
+    ) -> None:
+        thread = threading.get_native_id()
+        with self._lock:
+            index = self._count
+            events = self._events
+            slot = index % self.capacity
+            if index >= self.capacity:
+                # the oldest event is overwritten
+                old = events[slot]
+                self._release_string(int(old["name"]))
+                self._release_string(int(old["model"]))
+                self._release_string(int(old["detail"]))
+            events[slot] = (
+                start_ns,
+                end_ns,
+                thread,
+                self._acquire_string(name),
+                self._acquire_string(model),
+                self._acquire_string(detail) if detail else 0,
+            )
+            self._count = index + 1
+
+
+class _TraceHook(CallHook):
+    def __init__(self, recorder: TraceRecorder, model: str):
+        self.recorder = recorder
+        self.model = model
+
+    def post_call(self, call: FunctionCall) -> None:
+        self.recorder._record(
+            call.name, call.start_ns, call.end_ns, self.model, call.detail
+        )
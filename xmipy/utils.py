@@ -1,20 +1,182 @@
 import ctypes
 import os
+import threading
 from contextlib import contextmanager
+from os import PathLike
 from pathlib import Path
-from typing import Any, Generator
+from typing import Any, ContextManager, Dict, Generator, List, Optional, Set, Union
 
 import numpy as np
 
 
-@contextmanager
-def cd(newdir: Path) -> Generator[None, None, None]:
-    prevdir = Path().cwd()
-    os.chdir(newdir)
-    try:
-        yield
-    finally:
-        os.chdir(prevdir)
+class _Frame:
+    """A directory entered by the `DirectoryManager`"""
+
+    def __init__(self, directory: Path, previous: Path):
+        self.directory = directory
+        self.previous = previous
+        self.holders: Dict[int, int] = {}
+
+
+class DirectoryManager:
+    """Reference counted, thread-safe changes of the working directory.
+
+    The working directory is global to the process. Entering the directory
+    which is already current only increments a count, so nested and
+    concurrent users of the same directory do not call `os.chdir`. A thread
+    may enter another directory once all other users of the current
+    directories are waiting to enter that same directory, otherwise it waits
+    until they release them. A thread which would wait for a user that in
+    turn waits for another directory raises a RuntimeError instead, as
+    neither could ever continue.
+
+    Directories are compared as absolute paths, relative ones are resolved
+    against the working directory at the time they are acquired.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._frames: List[_Frame] = []
+        # the directory every blocked thread waits to enter
+        self._waiting: Dict[int, Path] = {}
+        # waiting threads which another thread entered their directory for
+        self._granted: Set[int] = set()
+
+    @property
+    def current(self) -> Optional[Path]:
+        """The absolute directory last entered through the manager, if any"""
+        frames = self._frames
+        return frames[-1].directory if frames else None
+
+    def acquire(self, directory: Union[str, PathLike[Any]]) -> Path:
+        """Enter a directory, waiting while other threads use another one
+
+        Returns
+        -------
+        Path
+            The absolute directory, to be passed to `release`.
+
+        Raises
+        ------
+        RuntimeError
+            When waiting would deadlock.
+        """
+        thread = threading.get_ident()
+        directory = Path(directory).absolute()
+        waiting = self._waiting
+        with self._condition:
+            try:
+                while thread not in self._granted:
+                    frames = self._frames
+                    if frames and frames[-1].directory == directory:
+                        frame = frames[-1]
+                        frame.holders[thread] = frame.holders.get(thread, 0) + 1
+                        return directory
+                    holding = any(thread in frame.holders for frame in frames)
+                    others = {
+                        holder
+                        for frame in frames
+                        for holder in frame.holders
+                        if holder != thread
+                    }
+                    # none of the others runs in the current directory
+                    if all(waiting.get(other) == directory for other in others):
+                        frame = _Frame(directory, Path.cwd())
+                        os.chdir(directory)
+                        frames.append(frame)
+                        frame.holders[thread] = 1
+                        # hand the directory to its waiters, before this
+                        # thread could leave it again
+                        for other, wanted in list(waiting.items()):
+                            if other != thread and wanted == directory:
+                                del waiting[other]
+                                frame.holders[other] = 1
+                                self._granted.add(other)
+                        self._condition.notify_all()
+                        return directory
+                    if holding and any(
+                        other in waiting and waiting[other] != directory
+                        for other in others
+                    ):
+                        raise RuntimeError(
+                            f"Cannot enter {directory}, another thread using "
+                            "the current directory waits to enter another one"
+                        )
+                    if waiting.get(thread) != directory:
+                        waiting[thread] = directory
+                        # others may wait for this thread to wait as well
+                        self._condition.notify_all()
+                    self._condition.wait()
+                self._granted.remove(thread)
+            finally:
+                waiting.pop(thread, None)
+        return directory
+
+    def release(self, directory: Union[str, PathLike[Any]]) -> None:
+        """Leave a directory, restoring the previous one when unused"""
+        thread = threading.get_ident()
+        directory = Path(directory).absolute()
+        with self._condition:
+            frames = self._frames
+            for frame in reversed(frames):
+                if frame.directory == directory and thread in frame.holders:
+                    frame.holders[thread] -= 1
+                    if frame.holders[thread] == 0:
+                        del frame.holders[thread]
+                    break
+            else:
+                raise RuntimeError(f"Directory {directory} was not entered")
+
+            previous = None
+            while frames and not frames[-1].holders:
+                previous = frames.pop().previous
+            if previous is not None:
+                os.chdir(previous)
+            # waiting threads may proceed once this thread left a directory
+            self._condition.notify_all()
+
+    @contextmanager
+    def enter(
+        self, directory: Union[str, PathLike[Any]]
+    ) -> Generator[None, None, None]:
+        """Context manager to acquire and release a directory"""
+        entered = self.acquire(directory)
+        try:
+            yield
+        finally:
+            self.release(entered)
+
+
+directory_manager = DirectoryManager()
+
+
+def cd(newdir: Union[str, PathLike[Any]]) -> ContextManager[None]:
+    """Context manager to temporarily change the working directory.
+
+    The change is coordinated by the process wide `directory_manager`.
+    """
+    return directory_manager.enter(newdir)
+
+
+def decode_records(buffer: Any, count: int, length: int) -> List[str]:
+    """Decode fixed-width, \\x00 terminated ASCII records at once.
+
+    Parameters
+    ----------
+    buffer : buffer-like
+        Buffer with `count` records of `length` bytes, e.g. from
+        `ctypes.create_string_buffer`.
+    count : int
+        Number of records.
+    length : int
+        Width of a record in bytes.
+    """
+    raw = np.frombuffer(buffer, dtype=np.uint8, count=count * length)
+    raw = raw.reshape(count, length)
+    # clear everything after the first \x00 of each record
+    raw = raw * np.logical_and.accumulate(raw != 0, axis=1)
+    records: List[str] = raw.view(f"S{length}")[:, 0].astype(str).tolist()
+    return records
 
 
 def repr_function_call(function: str, *args: Any) -> str:
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Optional
 
 from bmipy import Bmi
 
@@ -122,13 +123,20 @@ class Xmi(Bmi):
         ...
 
     @abstractmethod
-    def report_timing_totals(self) -> float:
+    def report_timing_totals(self, group_by: Optional[str] = None) -> float:
         """Logs and returns total time spent
 
+        Parameters
+        ----------
+        group_by : str, optional
+            "period" or "variable" to split the statistics of every function
+            by the periods or variables its calls were timed for.
+
         Returns
         -------
         float
-            Total time spent
+            Total time spent, as a `TimingReport` with the call count, mean,
+            percentiles, maximum and share of the total time per function
 
         Raises
         ------
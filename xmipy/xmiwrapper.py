@@ -1,6 +1,14 @@
+import atexit
+import ctypes
 import logging
 import os
 import platform
+import shutil
+import sys
+import tempfile
+import time
+import weakref
+from contextlib import contextmanager, nullcontext
 from ctypes import (
     CDLL,
     POINTER,
@@ -12,18 +20,36 @@ from ctypes import (
     c_void_p,
     create_string_buffer,
 )
+from dataclasses import dataclass
 from enum import Enum, IntEnum, unique
 from os import PathLike
 from pathlib import Path
-from typing import Any, Callable, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 from numpy.typing import NDArray
 
+from xmipy.catalogue import VariableCatalogue
 from xmipy.errors import InputError, TimerError, XMIError
-from xmipy.logger import get_logger, show_logger_message
+from xmipy.grid import Grid
+from xmipy.hooks import CallHook, FunctionCall, LoggingHook, TimingHook
+from xmipy.logger import _dispatchers, get_logger, show_logger_message
+from xmipy.timers.report import TimingReport
 from xmipy.timers.timer import Timer
-from xmipy.utils import cd, repr_function_call
+from xmipy.utils import cd, decode_records, directory_manager, repr_function_call
 from xmipy.xmi import Xmi
 
 
@@ -39,6 +65,149 @@ class State(Enum):
     INITIALIZED = 2
 
 
+_no_cd = nullcontext()
+
+# temporary directories with clones of libraries, and the handles of the
+# loaded clones, see `XmiWrapper`
+_library_clones: Dict[Path, int] = {}
+# the wrappers of cloned libraries which are still alive
+_clone_wrappers: "weakref.WeakSet[XmiWrapper]" = weakref.WeakSet()
+
+
+@atexit.register
+def _remove_library_clones() -> None:
+    if sys.platform == "win32":
+        # a loaded library cannot be removed on Windows, so it is unloaded,
+        # after the wrappers still alive no longer call into it
+        import _ctypes
+
+        for wrapper in list(_clone_wrappers):
+            wrapper._release_library()
+        for handle in _library_clones.values():
+            if handle:
+                _ctypes.FreeLibrary(handle)
+    for clone_dir in _library_clones:
+        shutil.rmtree(clone_dir, ignore_errors=True)
+
+
+_c_int_p = POINTER(c_int)
+_c_double_p = POINTER(c_double)
+
+# Argument types of the functions exported by a library implementing the XMI,
+# buffers and arrays are passed as untyped pointers. All return a status code.
+_ARGTYPES: Dict[str, Tuple[Any, ...]] = {
+    "initialize": (c_char_p,),
+    "initialize_mpi": (_c_int_p,),
+    "update": (),
+    "update_until": (c_double,),
+    "finalize": (),
+    "get_current_time": (_c_double_p,),
+    "get_start_time": (_c_double_p,),
+    "get_end_time": (_c_double_p,),
+    "get_time_step": (_c_double_p,),
+    "get_component_name": (c_void_p,),
+    "get_version": (c_void_p,),
+    "get_input_item_count": (_c_int_p,),
+    "get_output_item_count": (_c_int_p,),
+    "get_input_var_names": (c_void_p,),
+    "get_output_var_names": (c_void_p,),
+    "get_var_grid": (c_char_p, _c_int_p),
+    "get_var_type": (c_char_p, c_void_p),
+    "get_var_shape": (c_char_p, c_void_p),
+    "get_var_rank": (c_char_p, _c_int_p),
+    "get_var_itemsize": (c_char_p, _c_int_p),
+    "get_var_nbytes": (c_char_p, _c_int_p),
+    "get_value": (c_char_p, c_void_p),
+    "get_value_ptr": (c_char_p, c_void_p),
+    "set_value": (c_char_p, c_void_p),
+    "get_grid_rank": (_c_int_p, _c_int_p),
+    "get_grid_size": (_c_int_p, _c_int_p),
+    "get_grid_type": (_c_int_p, c_void_p),
+    "get_grid_shape": (_c_int_p, c_void_p),
+    "get_grid_x": (_c_int_p, c_void_p),
+    "get_grid_y": (_c_int_p, c_void_p),
+    "get_grid_z": (_c_int_p, c_void_p),
+    "get_grid_node_count": (_c_int_p, _c_int_p),
+    "get_grid_face_count": (_c_int_p, _c_int_p),
+    "get_grid_face_nodes": (_c_int_p, c_void_p),
+    "get_grid_nodes_per_face": (_c_int_p, c_void_p),
+    "prepare_time_step": (_c_double_p,),
+    "do_time_step": (),
+    "finalize_time_step": (),
+    "get_subcomponent_count": (_c_int_p,),
+    "prepare_solve": (_c_int_p,),
+    "solve": (_c_int_p, _c_int_p),
+    "finalize_solve": (_c_int_p,),
+    "get_var_address": (c_char_p, c_char_p, c_char_p, c_void_p),
+    "get_last_bmi_error": (c_void_p,),
+}
+
+
+@dataclass
+class VarInfo:
+    """Metadata of a kernel variable, as cached by `XmiWrapper`
+
+    `itemsize`, `nbytes` and `grid` are only queried when first requested.
+    """
+
+    rank: int
+    type: str
+    shape: Tuple[int, ...]
+    itemsize: Optional[int] = None
+    nbytes: Optional[int] = None
+    grid: Optional[int] = None
+
+
+def _check_dest(
+    name: str, dest: NDArray[Any], dtype: Any, shape: Tuple[int, ...]
+) -> None:
+    """Check a destination buffer before the kernel copies a variable into it"""
+    if dest.dtype != dtype:
+        raise InputError(f"Array for {name} should have {np.dtype(dtype)} elements")
+    if dest.size != int(np.prod(shape)):
+        raise InputError(f"Array for {name} should have {int(np.prod(shape))} elements")
+
+
+def _npz_member_shape(archive: Any, name: str) -> Tuple[int, ...]:
+    """Read the shape of an array in a .npz archive without loading it"""
+    with archive.zip.open(name + ".npy") as file:
+        version = np.lib.format.read_magic(file)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(file)
+        else:
+            header = np.lib.format.read_array_header_2_0(file)
+    shape: Tuple[int, ...] = header[0]
+    return shape
+
+
+class Indices:
+    """Flat indices into a variable, validated once for repeated use.
+
+    Parameters
+    ----------
+    inds : NDArray[np.integer]
+        One-dimensional array of flat, zero-based indices, for instance
+        int32 or int64. The indices are copied.
+    """
+
+    def __init__(self, inds: NDArray[np.integer[Any]]) -> None:
+        array = np.array(inds, dtype=np.intp)
+        if array.ndim != 1:
+            raise InputError("Indices should be one-dimensional")
+        array.flags.writeable = False
+        self.array = array
+        self.lower = int(array.min()) if array.size else 0
+        self.upper = int(array.max()) if array.size else -1
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def check(self, size: int) -> None:
+        """Check if the indices are within a variable of the given size"""
+        if self.lower < 0 or self.upper >= size:
+            raise InputError(f"Indices out of bounds for size {size}")
+
+
 class XmiWrapper(Xmi):
     """The implementation of the XMI"""
 
@@ -49,6 +218,9 @@ class XmiWrapper(Xmi):
         working_directory: Union[str, PathLike[Any], None] = None,
         timing: bool = False,
         logger_level: Union[str, int] = 0,
+        cache_metadata: bool = False,
+        cache_strings: bool = False,
+        clone_library: bool = False,
     ):
         """
         Constructor of `XmiWrapper`
@@ -80,10 +252,7 @@ class XmiWrapper(Xmi):
         In [7]: mf6.get_value('SLN_1/MXITER')
         DEBUG:libmf6.so: execute function: get_var_rank(c_char_p(b'SLN_1/MXITER'), &c_int(0)) returned 0
         DEBUG:libmf6.so: execute function: get_var_type(c_char_p(b'SLN_1/MXITER'), &c_char_Array_51(b'INTEGER')) returned 0
-        DEBUG:libmf6.so: execute function: get_var_type(c_char_p(b'SLN_1/MXITER'), &c_char_Array_51(b'INTEGER')) returned 0
-        DEBUG:libmf6.so: execute function: get_value_ptr_int(c_char_p(b'SLN_1/MXITER'), &ndpointer_<i4_1d_1_C) returned 0
-        DEBUG:libmf6.so: execute function: get_var_type(c_char_p(b'SLN_1/MXITER'), &c_char_Array_51(b'INTEGER')) returned 0
-        DEBUG:libmf6.so: execute function: get_value_ptr_int(c_char_p(b'SLN_1/MXITER'), &ndpointer_<i4_1d_1_C) returned 0
+        DEBUG:libmf6.so: execute function: get_value_ptr(c_char_p(b'SLN_1/MXITER'), &ndpointer_<i4_1d_1_C) returned 0
         Out[7]: array([25], dtype=int32)
         ```
 
@@ -97,7 +266,8 @@ class XmiWrapper(Xmi):
 
         working_directory : Union[str, PathLike, None], optional
             The working directory the shared library expects when being called,
-            by default None
+            by default None. Relative paths are resolved against the current
+            working directory.
 
         timing : bool, optional
             Whether timing should be activated, by default False
@@ -105,10 +275,36 @@ class XmiWrapper(Xmi):
         logger_level : str, int, optional
             Logger level, default 0 ("NOTSET"). Accepted values are
             "DEBUG" (10), "INFO" (20), "WARNING" (30), "ERROR" (40) or
-            "CRITICAL" (50).
+            "CRITICAL" (50). Kernel function calls are logged while the
+            logger is enabled for "DEBUG", however its level is changed.
+
+        cache_metadata : bool, optional
+            Whether the rank, type, shape, itemsize, nbytes and grid of
+            variables are cached after they are first queried, by default
+            False. The cache is cleared by `initialize()` and `finalize()`,
+            use `clear_var_info()` when the kernel reallocates a variable.
+
+        cache_strings : bool, optional
+            Whether the decoded values of string array variables are cached,
+            by default False. `get_value` then returns the same read-only
+            array until `clear_string_values()`, `initialize()` or
+            `finalize()` is called. Only use this for strings which do not
+            change, such as boundary names.
+
+        clone_library : bool, optional
+            Whether the library is loaded from a private copy, by default
+            False. The dynamic loader returns the same handle for a library
+            loaded twice, so wrappers of the same library share all state of
+            the kernel. A clone gives this wrapper independent state, so that
+            several models can run in one process. Dependencies of the library
+            should be found through the search path or `lib_dependency`, not
+            relative to the library. The copy is removed on `finalize()`, or
+            on Windows, where a loaded library cannot be removed, at exit of
+            the interpreter, after the library has been unloaded.
         """
 
         self._state = State.UNINITIALIZED
+        self._lib_released = False
         self.libname = Path(lib_path).name
         self.logger = get_logger(self.libname, logger_level)
 
@@ -119,24 +315,208 @@ class XmiWrapper(Xmi):
         # `winmode` has no effect while running on Linux or macOS
         # Note: this could make xmipy less secure (dll-injection)
         # Can we get it to work without this flag?
-        self.lib = CDLL(str(lib_path), winmode=0x08)
+        self._lib_clone: Optional[Path] = None
+        if clone_library:
+            lib_path = self._clone_library(lib_path)
+        self.lib = CDLL(str(lib_path), mode=ctypes.RTLD_LOCAL, winmode=0x08)
+        if self._lib_clone is not None:
+            _library_clones[self._lib_clone.parent] = self.lib._handle
+            _clone_wrappers.add(self)
+        self._bind_functions()
 
         if working_directory:
-            self.working_directory = Path(working_directory)
+            self.working_directory = Path(working_directory).absolute()
         else:
             self.working_directory = Path().cwd()
+        self._session_depth = 0
+        self.cache_metadata = cache_metadata
+        self._var_info: Dict[str, VarInfo] = {}
+        self.cache_strings = cache_strings
+        self._string_values: Dict[str, NDArray[np.str_]] = {}
+        self._grids: Dict[int, Grid] = {}
+        self._var_addresses: Dict[Tuple[str, str, str], str] = {}
+        self._catalogue: Optional[VariableCatalogue] = None
+
+        # reused arguments of frequently called functions
+        self._c_current_time = c_double(0.0)
+        self._c_component_id = c_int(0)
+        self._c_has_converged = c_int(0)
+
+        # selects how kernel functions are executed
+        self._call_hooks: List[CallHook] = []
+        self._logging_hook = LoggingHook(self.logger)
         self.timing = timing
+        _dispatchers.add(self)
 
-        if self.timing:
+    @property
+    def timing(self) -> bool:
+        """Whether timing is activated"""
+        return self._timing
+
+    @timing.setter
+    def timing(self, timing: bool) -> None:
+        self._timing = timing
+        if timing and not hasattr(self, "timer"):
             self.timer = Timer(
                 name=self.libname,
                 text="Elapsed time for {name}.{fn_name}: {seconds:0.4f} seconds",
             )
+            self._timing_hook = TimingHook(self.timer)
+        self._select_execute_function()
+
+    def set_logger_level(self, level: Union[str, int]) -> None:
+        """Set the level of the logger.
+
+        Kernel function calls are logged at "DEBUG" level.
+
+        Parameters
+        ----------
+        level : str, int
+            Logger level, e.g. "DEBUG" (10) or "INFO" (20).
+        """
+        self.logger.setLevel(level)
+        self._select_execute_function()
+
+    def refresh_dispatcher(self) -> None:
+        """Follow a change of the logger level made elsewhere.
+
+        The logger level is only looked at when the dispatcher of kernel
+        functions is selected, by `set_logger_level`, `show_logger_message`
+        and when timing or hooks change. Call this after changing the level
+        otherwise, e.g. by `logging.getLogger(mf6.libname).setLevel()` or on
+        the root logger, to start or stop logging kernel function calls.
+        """
+        self._select_execute_function()
+
+    def add_call_hook(self, hook: CallHook) -> None:
+        """Call a hook around every call of a kernel function, see `CallHook`"""
+        self._call_hooks.append(hook)
+        self._select_execute_function()
+
+    def remove_call_hook(self, hook: CallHook) -> None:
+        """Remove a hook added by `add_call_hook()`"""
+        self._call_hooks.remove(hook)
+        self._select_execute_function()
+
+    def _select_execute_function(self) -> None:
+        """Select the dispatcher of kernel functions.
+
+        Timing and debug logging are built-in hooks. Without any hooks,
+        kernel functions are executed without any instrumentation.
+        """
+        hooks: List[CallHook] = [self._timing_hook] if self.timing else []
+        if self.logger.isEnabledFor(logging.DEBUG):
+            hooks.append(self._logging_hook)
+        self._active_hooks = (*hooks, *self._call_hooks)
+
+        self._execute_function: Callable[..., None]
+        if self._active_hooks:
+            self._execute_function = self._execute_function_hooked
+        else:
+            self._execute_function = self._execute_function_fast
+
+    def _bind_functions(self) -> None:
+        """Resolve and declare the types of all XMI functions of the library.
+
+        Functions the library does not export raise an `XMIError` naming the
+        function when they are called.
+        """
+        self._functions: Dict[str, Callable[..., int]] = {}
+        missing = []
+        for name, argtypes in _ARGTYPES.items():
+            try:
+                function = getattr(self.lib, name)
+            except AttributeError:
+                missing.append(name)
+                self._functions[name] = self._missing_function(name)
+                continue
+            function.argtypes = argtypes
+            function.restype = c_int
+            self._functions[name] = function
+        if missing:
+            self.logger.debug(
+                "%s does not export: %s", self.libname, ", ".join(missing)
+            )
+
+    def _missing_function(self, name: str) -> Callable[..., int]:
+        def missing_function(*_: Any) -> int:
+            raise XMIError(f"Function {name!r} is not exported by {self.libname}")
+
+        missing_function.__name__ = name
+        return missing_function
+
+    def _clone_library(self, lib_path: Union[str, PathLike[Any]]) -> Path:
+        # a hard link is not enough, the loader recognizes the file
+        clone_dir = Path(tempfile.mkdtemp(prefix="xmipy_"))
+        _library_clones[clone_dir] = 0
+        self._lib_clone = clone_dir / Path(lib_path).name
+        shutil.copy2(lib_path, self._lib_clone)
+        return self._lib_clone
+
+    def _remove_library_clone(self) -> None:
+        # on Windows a loaded library cannot be removed, this is retried at exit
+        if self._lib_clone is not None:
+            clone_dir = self._lib_clone.parent
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            if not clone_dir.exists():
+                _library_clones.pop(clone_dir, None)
+
+    @contextmanager
+    def session(self) -> Generator[None, None, None]:
+        """Context manager to stay in the working directory for a whole run.
+
+        Within the session the kernel functions do not change the working
+        directory on every call. Sessions are reference counted through
+        `xmipy.utils.directory_manager`, so wrappers sharing a working
+        directory can be in a session at the same time, while other threads
+        wait before entering a different directory.
+
+        ```
+        with mf6.session():
+            mf6.initialize()
+            while mf6.get_current_time() < mf6.get_end_time():
+                mf6.update()
+            mf6.finalize()
+        ```
+        """
+        with directory_manager.enter(self.working_directory):
+            self._session_depth += 1
+            try:
+                yield
+            finally:
+                self._session_depth -= 1
+
+    def _cd(self) -> ContextManager[None]:
+        if self._session_depth and directory_manager.current == self.working_directory:
+            return _no_cd
+        return cd(self.working_directory)
+
+    def _clear_caches(self) -> None:
+        """Clear everything cached for the previous run of the model"""
+        self.clear_var_info()
+        self.clear_string_values()
+        self._grids.clear()
+        self._var_addresses.clear()
+        self._catalogue = None
 
     def __del__(self) -> None:
-        if self._state == State.INITIALIZED:
+        if self._state == State.INITIALIZED and not self._lib_released:
             self.finalize()
 
+    def _release_library(self) -> None:
+        """Finalize the kernel before its library is unloaded at exit
+
+        The wrapper cannot be used anymore afterwards.
+        """
+        if self._lib_released:
+            return
+        if self._state == State.INITIALIZED:
+            try:
+                self.finalize()
+            except Exception:
+                self.logger.exception("Failed to finalize %s at exit", self.libname)
+        self._lib_released = True
+
     @staticmethod
     def _add_lib_dependency(lib_dependency: Union[str, PathLike[Any]]) -> None:
         lib_dependency = str(Path(lib_dependency).absolute())
@@ -151,7 +531,7 @@ class XmiWrapper(Xmi):
             else:
                 os.environ["LD_LIBRARY_PATH"] = lib_dependency
 
-    def report_timing_totals(self) -> float:
+    def report_timing_totals(self, group_by: Optional[str] = None) -> TimingReport:
         if self.timing:
             total = self.timer.report_totals()
             with show_logger_message(self.logger):
@@ -160,10 +540,47 @@ class XmiWrapper(Xmi):
                     self.libname,
                     total,
                 )
-            return total
+            return TimingReport.from_timers(self.timer.timers, group_by)
         else:
             raise TimerError("Timing not activated")
 
+    def set_timing_period(self, period: Union[int, str, None]) -> None:
+        """Key the timings of subsequent calls by a period of the simulation
+
+        With periods set, `report_timing_totals(group_by="period")` reports
+        every period separately.
+
+        Parameters
+        ----------
+        period : int, str or None
+            The period, e.g. the stress period number, or None to stop
+            keying by period.
+        """
+        if not self.timing:
+            raise TimerError("Timing not activated")
+        self._timing_hook.period = None if period is None else str(period)
+
+    def set_timing_detail(self, by_variable: bool, count_bytes: bool = False) -> None:
+        """Key the timings of variable transfers by variable address
+
+        With variables set, `report_timing_totals(group_by="variable")`
+        reports every variable passed to `get_value*` and `set_value*`
+        separately, e.g. to find the transfers worth replacing by pointer
+        views.
+
+        Parameters
+        ----------
+        by_variable : bool
+            Whether the timings of subsequent calls are keyed by variable.
+        count_bytes : bool, optional
+            Whether the bytes copied by `get_value` and `set_value` are
+            counted, for the throughput in the report, by default False.
+        """
+        if not self.timing:
+            raise TimerError("Timing not activated")
+        self._timing_hook.by_variable = by_variable
+        self._timing_hook.count_bytes = count_bytes
+
     def get_constant_int(self, name: str) -> int:
         c_var = c_int.in_dll(self.lib, name)
         return c_var.value
@@ -174,77 +591,85 @@ class XmiWrapper(Xmi):
 
     def initialize(self, config_file: Union[str, PathLike[Any]] = "") -> None:
         if self._state == State.UNINITIALIZED:
-            with cd(self.working_directory):
-                self._execute_function(self.lib.initialize, os.fsencode(config_file))
+            self._clear_caches()
+            with self._cd():
+                self._execute_function(
+                    self._functions["initialize"], os.fsencode(config_file)
+                )
                 self._state = State.INITIALIZED
         else:
             raise InputError("The library is already initialized")
 
     def initialize_mpi(self, value: int) -> None:
         if self._state == State.UNINITIALIZED:
-            with cd(self.working_directory):
+            self._clear_caches()
+            with self._cd():
                 comm = c_int(value)
-                self._execute_function(self.lib.initialize_mpi, byref(comm))
+                self._execute_function(self._functions["initialize_mpi"], byref(comm))
                 self._state = State.INITIALIZED
         else:
             raise InputError("The library is already initialized")
 
     def update(self) -> None:
-        with cd(self.working_directory):
-            self._execute_function(self.lib.update)
+        with self._cd():
+            self._execute_function(self._functions["update"])
 
     def update_until(self, time: float) -> None:
-        with cd(self.working_directory):
-            self._execute_function(self.lib.update_until, c_double(time))
+        with self._cd():
+            self._execute_function(self._functions["update_until"], c_double(time))
 
     def finalize(self) -> None:
         if self._state == State.INITIALIZED:
-            with cd(self.working_directory):
-                self._execute_function(self.lib.finalize)
+            with self._cd():
+                self._execute_function(self._functions["finalize"])
                 self._state = State.UNINITIALIZED
+            self._clear_caches()
+            self._remove_library_clone()
         else:
             raise InputError("The library is not initialized yet")
 
     def get_current_time(self) -> float:
-        current_time = c_double(0.0)
-        self._execute_function(self.lib.get_current_time, byref(current_time))
+        current_time = self._c_current_time
+        self._execute_function(self._functions["get_current_time"], current_time)
         return current_time.value
 
     def get_start_time(self) -> float:
         start_time = c_double(0.0)
-        self._execute_function(self.lib.get_start_time, byref(start_time))
+        self._execute_function(self._functions["get_start_time"], byref(start_time))
         return start_time.value
 
     def get_end_time(self) -> float:
         end_time = c_double(0.0)
-        self._execute_function(self.lib.get_end_time, byref(end_time))
+        self._execute_function(self._functions["get_end_time"], byref(end_time))
         return end_time.value
 
     def get_time_step(self) -> float:
         dt = c_double(0.0)
-        self._execute_function(self.lib.get_time_step, byref(dt))
+        self._execute_function(self._functions["get_time_step"], byref(dt))
         return dt.value
 
     def get_component_name(self) -> str:
         len_name = self.get_constant_int("BMI_LENCOMPONENTNAME")
         component_name = create_string_buffer(len_name)
-        self._execute_function(self.lib.get_component_name, byref(component_name))
+        self._execute_function(
+            self._functions["get_component_name"], byref(component_name)
+        )
         return component_name.value.decode("ascii")
 
     def get_version(self) -> str:
         len_version = self.get_constant_int("BMI_LENVERSION")
         version = create_string_buffer(len_version)
-        self._execute_function(self.lib.get_version, byref(version))
+        self._execute_function(self._functions["get_version"], byref(version))
         return version.value.decode("ascii")
 
     def get_input_item_count(self) -> int:
         count = c_int(0)
-        self._execute_function(self.lib.get_input_item_count, byref(count))
+        self._execute_function(self._functions["get_input_item_count"], byref(count))
         return count.value
 
     def get_output_item_count(self) -> int:
         count = c_int(0)
-        self._execute_function(self.lib.get_output_item_count, byref(count))
+        self._execute_function(self._functions["get_output_item_count"], byref(count))
         return count.value
 
     def get_input_var_names(self) -> Tuple[str]:
@@ -255,14 +680,11 @@ class XmiWrapper(Xmi):
 
         # get a (1-dim) char array (char*) containing the input variable
         # names as \x00 terminated sub-strings
-        self._execute_function(self.lib.get_input_var_names, byref(names))
+        self._execute_function(self._functions["get_input_var_names"], byref(names))
 
         # decode
-        input_vars: Tuple[str] = tuple(
-            names[i * len_address : (i + 1) * len_address]  # type: ignore
-            .split(b"\0", 1)[0]
-            .decode("ascii")
-            for i in range(nr_input_vars)
+        input_vars: Tuple[str] = tuple(  # type: ignore
+            decode_records(names, nr_input_vars, len_address)
         )
         return input_vars
 
@@ -274,31 +696,41 @@ class XmiWrapper(Xmi):
 
         # get a (1-dim) char array (char*) containing the output variable
         # names as \x00 terminated sub-strings
-        self._execute_function(self.lib.get_output_var_names, byref(names))
+        self._execute_function(self._functions["get_output_var_names"], byref(names))
 
         # decode
-        output_vars: Tuple[str] = tuple(
-            names[i * len_address : (i + 1) * len_address]  # type: ignore
-            .split(b"\0", 1)[0]
-            .decode("ascii")
-            for i in range(nr_output_vars)
+        output_vars: Tuple[str] = tuple(  # type: ignore
+            decode_records(names, nr_output_vars, len_address)
         )
         return output_vars
 
     def get_var_grid(self, name: str) -> int:
+        if self.cache_metadata:
+            info = self.get_var_info(name)
+            if info.grid is None:
+                info.grid = self._get_var_grid(name)
+            return info.grid
+        return self._get_var_grid(name)
+
+    def _get_var_grid(self, name: str) -> int:
         grid_id = c_int(0)
         self._execute_function(
-            self.lib.get_var_grid,
+            self._functions["get_var_grid"],
             c_char_p(name.encode()),
             byref(grid_id),
         )
         return grid_id.value
 
     def get_var_type(self, name: str) -> str:
+        if self.cache_metadata:
+            return self.get_var_info(name).type
+        return self._get_var_type(name)
+
+    def _get_var_type(self, name: str) -> str:
         len_var_type = self.get_constant_int("BMI_LENVARTYPE")
         var_type = create_string_buffer(len_var_type)
         self._execute_function(
-            self.lib.get_var_type,
+            self._functions["get_var_type"],
             c_char_p(name.encode()),
             byref(var_type),
         )
@@ -306,19 +738,28 @@ class XmiWrapper(Xmi):
 
     # strictly speaking not BMI...
     def get_var_shape(self, name: str) -> NDArray[np.int32]:
-        rank = self.get_var_rank(name)
+        if self.cache_metadata:
+            return np.array(self.get_var_info(name).shape, dtype=np.int32)
+        return self._get_var_shape(name, self._get_var_rank(name))
+
+    def _get_var_shape(self, name: str, rank: int) -> NDArray[np.int32]:
         array = np.zeros(rank, dtype=np.int32)
         self._execute_function(
-            self.lib.get_var_shape,
+            self._functions["get_var_shape"],
             c_char_p(name.encode()),
             c_void_p(array.ctypes.data),
         )
         return array
 
     def get_var_rank(self, name: str) -> int:
+        if self.cache_metadata:
+            return self.get_var_info(name).rank
+        return self._get_var_rank(name)
+
+    def _get_var_rank(self, name: str) -> int:
         rank = c_int(0)
         self._execute_function(
-            self.lib.get_var_rank,
+            self._functions["get_var_rank"],
             c_char_p(name.encode()),
             byref(rank),
         )
@@ -328,23 +769,97 @@ class XmiWrapper(Xmi):
         raise NotImplementedError
 
     def get_var_itemsize(self, name: str) -> int:
+        if self.cache_metadata:
+            info = self.get_var_info(name)
+            if info.itemsize is None:
+                info.itemsize = self._get_var_itemsize(name)
+            return info.itemsize
+        return self._get_var_itemsize(name)
+
+    def _get_var_itemsize(self, name: str) -> int:
         item_size = c_int(0)
         self._execute_function(
-            self.lib.get_var_itemsize,
+            self._functions["get_var_itemsize"],
             c_char_p(name.encode()),
             byref(item_size),
         )
         return item_size.value
 
     def get_var_nbytes(self, name: str) -> int:
+        if self.cache_metadata:
+            info = self.get_var_info(name)
+            if info.nbytes is None:
+                info.nbytes = self._get_var_nbytes(name)
+            return info.nbytes
+        return self._get_var_nbytes(name)
+
+    def _get_var_nbytes(self, name: str) -> int:
         nbytes = c_int(0)
         self._execute_function(
-            self.lib.get_var_nbytes,
+            self._functions["get_var_nbytes"],
             c_char_p(name.encode()),
             byref(nbytes),
         )
         return nbytes.value
 
+    def get_var_info(self, name: str) -> VarInfo:
+        """Get the rank, type and shape of a variable.
+
+        When `cache_metadata` is enabled, the result is taken from the cache
+        and stored there on the first call for the variable.
+
+        Parameters
+        ----------
+        name : str
+            The variable address.
+
+        Returns
+        -------
+        VarInfo
+            The metadata of the variable.
+        """
+        info = self._var_info.get(name)
+        if info is None:
+            rank = self._get_var_rank(name)
+            var_type = self._get_var_type(name)
+            shape = tuple(self._get_var_shape(name, rank).tolist()) if rank else ()
+            info = VarInfo(rank=rank, type=var_type, shape=shape)
+            if self.cache_metadata:
+                self._var_info[name] = info
+        return info
+
+    def cache_var_info(self, names: Optional[Iterable[str]] = None) -> None:
+        """Fill the metadata cache in a single pass.
+
+        Parameters
+        ----------
+        names : Iterable[str], optional
+            The variable addresses to cache, by default all input and
+            output variables.
+        """
+        if not self.cache_metadata:
+            raise InputError("Metadata caching not activated")
+        if names is None:
+            names = dict.fromkeys(
+                self.get_input_var_names() + self.get_output_var_names()
+            )
+        for name in names:
+            self.get_var_info(name)
+
+    def clear_var_info(self, name: Optional[str] = None) -> None:
+        """Clear the metadata cache
+
+        Parameters
+        ----------
+        name : str, optional
+            Only clear the metadata of this variable address, by default
+            the whole cache is cleared.
+        """
+        if name is None:
+            self._var_info.clear()
+        else:
+            self._var_info.pop(name, None)
+
     def get_var_location(self, name: str) -> str:
         raise NotImplementedError
 
@@ -353,14 +868,19 @@ class XmiWrapper(Xmi):
 
     def get_value(
         self, name: str, dest: Union[NDArray[Any], None] = None
+    ) -> NDArray[Any]:
+        return self._get_value(name, self.get_var_info(name), dest)
+
+    def _get_value(
+        self, name: str, info: VarInfo, dest: Union[NDArray[Any], None]
     ) -> NDArray[Any]:
         # make sure that optional array is of correct layout:
         if dest is not None and not dest.flags["C"]:
             raise InputError("Array should have C layout")
 
         # first deal with scalars
-        rank = self.get_var_rank(name)
-        var_type = self.get_var_type(name)
+        rank = info.rank
+        var_type = info.type
         var_type_lower = var_type.lower()
 
         if rank == 0:
@@ -370,39 +890,49 @@ class XmiWrapper(Xmi):
                 if dest is None:
                     dest = np.empty(1, dtype=strtype, order="C")
                 self._execute_function(
-                    self.lib.get_value,
+                    self._functions["get_value"],
                     c_char_p(name.encode()),
                     byref(dest.ctypes.data_as(POINTER(c_char))),
+                    nbytes=dest.nbytes,
                 )
                 dest[0] = dest[0].decode("ascii").strip()
                 return dest.astype(str)
             else:
-                src = self.get_value_ptr_scalar(name)
+                src = self._get_value_ptr_scalar(name, var_type)
                 if dest is None:
-                    return self.get_value_ptr_scalar(name).copy()
+                    return src.copy()
                 else:
                     dest[0] = src[0]
                     return dest
 
-        var_shape = self.get_var_shape(name)
+        var_shape = info.shape
 
         if var_type_lower.startswith("double"):
             if dest is None:
                 dest = np.empty(shape=var_shape, dtype=np.float64, order="C")
+            else:
+                _check_dest(name, dest, np.float64, var_shape)
             self._execute_function(
-                self.lib.get_value,
+                self._functions["get_value"],
                 c_char_p(name.encode()),
                 byref(dest.ctypes.data_as(POINTER(c_double))),
+                nbytes=dest.nbytes,
             )
         elif var_type_lower.startswith("int"):
             if dest is None:
                 dest = np.empty(shape=var_shape, dtype=np.int32, order="C")
+            else:
+                _check_dest(name, dest, np.int32, var_shape)
             self._execute_function(
-                self.lib.get_value,
+                self._functions["get_value"],
                 c_char_p(name.encode()),
                 byref(dest.ctypes.data_as(POINTER(c_int))),
+                nbytes=dest.nbytes,
             )
         elif var_type_lower.startswith("string"):
+            cached = self._string_values.get(name)
+            if cached is not None:
+                return cached
             if dest is None:
                 if var_shape[0] == 0:
                     return np.empty((0,), "U1")
@@ -410,30 +940,73 @@ class XmiWrapper(Xmi):
                 strtype = "<S" + str(ilen + 1)
                 dest = np.empty(var_shape[0], dtype=strtype, order="C")
             self._execute_function(
-                self.lib.get_value,
+                self._functions["get_value"],
                 c_char_p(name.encode()),
                 byref(dest.ctypes.data_as(POINTER(c_char))),
+                nbytes=dest.nbytes,
             )
-            for i, x in enumerate(dest):
-                dest[i] = x.decode("ascii").strip()
-            return dest.astype(str)
+            dest[:] = np.char.strip(dest)
+            values = dest.astype(str)
+            if self.cache_strings:
+                values.flags.writeable = False
+                self._string_values[name] = values
+            return values
         else:
             raise InputError(f"Unsupported value type {var_type!r}")
 
         return dest
 
+    def get_values(
+        self,
+        names: Iterable[str],
+        dests: Optional[MutableMapping[str, NDArray[Any]]] = None,
+    ) -> MutableMapping[str, NDArray[Any]]:
+        """Get copies of the values of several variables.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The variable addresses.
+        dests : MutableMapping[str, NDArray], optional
+            Destination buffers by variable address. Missing buffers are
+            allocated and added, so passing the same mapping on every
+            iteration reuses the buffers of all numeric variables. Buffers
+            must have the shape and type of their variable.
+
+        Returns
+        -------
+        MutableMapping[str, NDArray]
+            `dests` when given, otherwise a new dict, with the values of
+            all requested variables.
+        """
+        if dests is None:
+            dests = {}
+        for name in names:
+            # the metadata is resolved once per variable
+            info = self.get_var_info(name)
+            if info.type.lower().startswith("string"):
+                # decoded strings cannot be read into again
+                dests[name] = self._get_value(name, info, None)
+                continue
+            dest = dests.get(name)
+            if dest is not None and dest.shape != (info.shape or (1,)):
+                raise InputError(
+                    f"Array for {name} should have shape {info.shape or (1,)}"
+                )
+            dests[name] = self._get_value(name, info, dest)
+        return dests
+
     def get_value_ptr(self, name: str) -> NDArray[Any]:
         # first scalars
-        rank = self.get_var_rank(name)
-        if rank == 0:
-            return self.get_value_ptr_scalar(name)
+        info = self.get_var_info(name)
+        if info.rank == 0:
+            return self._get_value_ptr_scalar(name, info.type)
 
-        var_type = self.get_var_type(name)
+        var_type = info.type
         var_type_lower = var_type.lower()
-        shape_array = self.get_var_shape(name)
 
-        # convert shape array to python tuple
-        shape_tuple = tuple(np.trim_zeros(shape_array))
+        # convert shape to python tuple without zeros
+        shape_tuple = tuple(np.trim_zeros(info.shape))
         ndim = len(shape_tuple)
 
         if var_type_lower.startswith("double"):
@@ -452,15 +1025,56 @@ class XmiWrapper(Xmi):
             raise InputError(f"Unsupported value type {var_type!r}")
         values = arraytype()
         self._execute_function(
-            self.lib.get_value_ptr,
+            self._functions["get_value_ptr"],
             c_char_p(name.encode()),
             byref(values),
             detail="for variable " + name,
         )
         return values.contents
 
+    def clear_string_values(self, name: Optional[str] = None) -> None:
+        """Clear the cache of string values
+
+        Parameters
+        ----------
+        name : str, optional
+            Only clear the values of this variable address, by default
+            the whole cache is cleared.
+        """
+        if name is None:
+            self._string_values.clear()
+        else:
+            self._string_values.pop(name, None)
+
+    def get_value_ptr_address(self, name: str) -> int:
+        """Get the address of the kernel memory of a variable.
+
+        This is the address `get_value_ptr` would wrap, which changes when
+        the kernel reallocates the variable.
+
+        Parameters
+        ----------
+        name : str
+            The variable address.
+
+        Returns
+        -------
+        int
+            The memory address, 0 if the variable is not allocated.
+        """
+        address = c_void_p()
+        self._execute_function(
+            self._functions["get_value_ptr"],
+            c_char_p(name.encode()),
+            byref(address),
+            detail="for variable " + name,
+        )
+        return address.value or 0
+
     def get_value_ptr_scalar(self, name: str) -> NDArray[Any]:
-        var_type = self.get_var_type(name)
+        return self._get_value_ptr_scalar(name, self.get_var_type(name))
+
+    def _get_value_ptr_scalar(self, name: str, var_type: str) -> NDArray[Any]:
         var_type_lower = var_type.lower()
         if var_type_lower.startswith("double"):
             arraytype = np.ctypeslib.ndpointer(
@@ -478,7 +1092,7 @@ class XmiWrapper(Xmi):
             raise InputError(f"Unsupported value type {var_type!r}")
         values = arraytype()
         self._execute_function(
-            self.lib.get_value_ptr,
+            self._functions["get_value_ptr"],
             c_char_p(name.encode()),
             byref(values),
             detail="for variable " + name,
@@ -486,9 +1100,27 @@ class XmiWrapper(Xmi):
         return values.contents
 
     def get_value_at_indices(
-        self, name: str, dest: NDArray[Any], inds: NDArray[np.int32]
+        self,
+        name: str,
+        dest: NDArray[Any],
+        inds: Union[NDArray[np.integer[Any]], "Indices"],
     ) -> NDArray[Any]:
-        raise NotImplementedError
+        """Get a copy of the values of a variable at flat indices.
+
+        The values are gathered from the pointer view without copying the
+        whole variable. Pass an `Indices` object when the same indices are
+        used repeatedly, so that they are only validated once.
+        """
+        if not isinstance(inds, Indices):
+            inds = Indices(inds)
+        flat = self.get_value_ptr(name).reshape(-1)
+        inds.check(flat.size)
+        if dest.dtype != flat.dtype:
+            raise InputError(f"Array for {name} should have {flat.dtype} elements")
+        if dest.shape != inds.array.shape:
+            raise InputError("Array should have the same size as the indices")
+        # bounds are checked already, clipping avoids checking every element
+        return np.take(flat, inds.array, out=dest, mode="clip")
 
     def set_value(self, name: str, values: NDArray[Any]) -> None:
         if not values.flags["C"]:
@@ -499,31 +1131,147 @@ class XmiWrapper(Xmi):
             if values.dtype != np.float64:
                 raise InputError("Array should have float64 elements")
             self._execute_function(
-                self.lib.set_value,
+                self._functions["set_value"],
                 c_char_p(name.encode()),
-                byref(values.ctypes.data_as(POINTER(c_double))),
+                byref(c_void_p(values.ctypes.data)),
+                nbytes=values.nbytes,
             )
         elif var_type_lower.startswith("int"):
             if values.dtype != np.int32:
                 raise InputError("Array should have int32 elements")
             self._execute_function(
-                self.lib.set_value,
+                self._functions["set_value"],
                 c_char_p(name.encode()),
-                byref(values.ctypes.data_as(POINTER(c_int))),
+                byref(c_void_p(values.ctypes.data)),
+                nbytes=values.nbytes,
             )
         else:
             raise InputError("Unsupported value type")
 
+    def set_values(self, values: Mapping[str, NDArray[Any]]) -> None:
+        """Set the values of several variables.
+
+        Parameters
+        ----------
+        values : Mapping[str, NDArray]
+            The new values by variable address.
+        """
+        for name, value in values.items():
+            self.set_value(name, value)
+
     def set_value_at_indices(
-        self, name: str, inds: NDArray[Any], src: NDArray[Any]
+        self,
+        name: str,
+        inds: Union[NDArray[np.integer[Any]], "Indices"],
+        src: NDArray[Any],
     ) -> None:
-        raise NotImplementedError
+        """Set the values of a variable at flat indices.
+
+        The values are scattered into the pointer view without copying the
+        whole variable. Pass an `Indices` object when the same indices are
+        used repeatedly, so that they are only validated once.
+        """
+        if not isinstance(inds, Indices):
+            inds = Indices(inds)
+        flat = self.get_value_ptr(name).reshape(-1)
+        inds.check(flat.size)
+        if src.shape != inds.array.shape:
+            raise InputError("Array should have the same size as the indices")
+        np.put(flat, inds.array, src, mode="clip")
+
+    def checkpoint(
+        self, path: Union[str, PathLike[Any]], names: Optional[Iterable[str]] = None
+    ) -> None:
+        """Write the values of variables to a single file.
+
+        The values are streamed straight from their pointer views into an
+        uncompressed archive with a .npy member per variable, as written by
+        `numpy.savez`, so that the size of a variable is only limited by the
+        ZIP64 format. Use `restore()` to copy them back into the same, or an
+        identically set up, model, for instance to branch scenarios from a
+        shared spin-up instead of recomputing it.
+
+        ```
+        mf6.initialize()
+        ... # spin-up
+        mf6.checkpoint("spinup.npz")
+        ... # scenario 1
+        mf6.restore("spinup.npz")
+        ... # scenario 2
+        ```
+
+        Parameters
+        ----------
+        path : Union[str, PathLike]
+            The file to write.
+        names : Iterable[str], optional
+            The variable addresses, by default all numeric output variables.
+            State which is not exposed as a variable is not checkpointed.
+        """
+        if names is None:
+            names = [
+                name
+                for name in self.get_output_var_names()
+                if self.get_var_type(name).lower().startswith(("double", "int"))
+                and self.get_var_nbytes(name) > 0
+            ]
+        views: Dict[str, Any] = {name: self.get_value_ptr(name) for name in names}
+        # a file object, so that numpy does not append ".npz" to the path
+        with Path(path).open("wb") as file:
+            np.savez(file, **views)
+
+    def restore(self, path: Union[str, PathLike[Any]]) -> None:
+        """Copy the values written by `checkpoint()` back into the model.
+
+        Parameters
+        ----------
+        path : Union[str, PathLike]
+            The file written by `checkpoint()`.
+        """
+        with np.load(os.fspath(path)) as checkpoint:
+            views = {name: self.get_value_ptr(name) for name in checkpoint.files}
+            # check all variables from their headers before anything is
+            # overwritten, then load them one at a time
+            for name, view in views.items():
+                shape = _npz_member_shape(checkpoint, name)
+                if view.shape != shape:
+                    raise InputError(
+                        f"Shape of {name!r} is {view.shape}, but {shape} in checkpoint"
+                    )
+            for name, view in views.items():
+                view[...] = checkpoint[name]
+
+    def get_var_catalogue(self) -> VariableCatalogue:
+        """Get the index of all variable addresses.
+
+        The catalogue is built on first use and kept until the model is
+        initialized or finalized again.
+        """
+        if self._catalogue is None:
+            self._catalogue = VariableCatalogue(self)
+        return self._catalogue
+
+    def get_grid(self, grid: int) -> Grid:
+        """Get the geometry of a grid in a single pass.
+
+        The grid is cached until the model is initialized or finalized
+        again, so repeated calls are cheap.
+
+        ```
+        grid = mf6.get_grid(mf6.get_var_grid("TEST_MODEL/X"))
+        grid.x, grid.y, grid.face_nodes
+        ```
+        """
+        cached = self._grids.get(grid)
+        if cached is None:
+            cached = self._grids[grid] = Grid.from_xmi(self, grid)
+        return cached
 
     def get_grid_rank(self, grid: int) -> int:
         grid_rank = c_int(0)
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_rank,
+            self._functions["get_grid_rank"],
             byref(c_grid),
             byref(grid_rank),
         )
@@ -533,7 +1281,7 @@ class XmiWrapper(Xmi):
         grid_size = c_int(0)
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_size,
+            self._functions["get_grid_size"],
             byref(c_grid),
             byref(grid_size),
         )
@@ -544,7 +1292,7 @@ class XmiWrapper(Xmi):
         grid_type = create_string_buffer(len_grid_type)
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_type,
+            self._functions["get_grid_type"],
             byref(c_grid),
             byref(grid_type),
         )
@@ -553,7 +1301,7 @@ class XmiWrapper(Xmi):
     def get_grid_shape(self, grid: int, shape: NDArray[np.int32]) -> NDArray[np.int32]:
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_shape,
+            self._functions["get_grid_shape"],
             byref(c_grid),
             c_void_p(shape.ctypes.data),
         )
@@ -572,7 +1320,7 @@ class XmiWrapper(Xmi):
     def get_grid_x(self, grid: int, x: NDArray[np.float64]) -> NDArray[np.float64]:
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_x,
+            self._functions["get_grid_x"],
             byref(c_grid),
             c_void_p(x.ctypes.data),
         )
@@ -581,7 +1329,7 @@ class XmiWrapper(Xmi):
     def get_grid_y(self, grid: int, y: NDArray[np.float64]) -> NDArray[np.float64]:
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_y,
+            self._functions["get_grid_y"],
             byref(c_grid),
             c_void_p(y.ctypes.data),
         )
@@ -590,7 +1338,7 @@ class XmiWrapper(Xmi):
     def get_grid_z(self, grid: int, z: NDArray[np.float64]) -> NDArray[np.float64]:
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_z,
+            self._functions["get_grid_z"],
             byref(c_grid),
             c_void_p(z.ctypes.data),
         )
@@ -600,7 +1348,7 @@ class XmiWrapper(Xmi):
         grid_node_count = c_int(0)
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_node_count,
+            self._functions["get_grid_node_count"],
             byref(c_grid),
             byref(grid_node_count),
         )
@@ -613,7 +1361,7 @@ class XmiWrapper(Xmi):
         grid_face_count = c_int(0)
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_face_count,
+            self._functions["get_grid_face_count"],
             byref(c_grid),
             byref(grid_face_count),
         )
@@ -634,7 +1382,7 @@ class XmiWrapper(Xmi):
     ) -> NDArray[np.int32]:
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_face_nodes,
+            self._functions["get_grid_face_nodes"],
             byref(c_grid),
             c_void_p(face_nodes.ctypes.data),
         )
@@ -645,7 +1393,7 @@ class XmiWrapper(Xmi):
     ) -> NDArray[np.int32]:
         c_grid = c_int(grid)
         self._execute_function(
-            self.lib.get_grid_nodes_per_face,
+            self._functions["get_grid_nodes_per_face"],
             byref(c_grid),
             c_void_p(nodes_per_face.ctypes.data),
         )
@@ -655,106 +1403,128 @@ class XmiWrapper(Xmi):
     # here starts the XMI
     # ===========================
     def prepare_time_step(self, dt: float) -> None:
-        with cd(self.working_directory):
+        with self._cd():
             c_dt = c_double(dt)
-            self._execute_function(self.lib.prepare_time_step, byref(c_dt))
+            self._execute_function(self._functions["prepare_time_step"], byref(c_dt))
 
     def do_time_step(self) -> None:
-        with cd(self.working_directory):
-            self._execute_function(self.lib.do_time_step)
+        with self._cd():
+            self._execute_function(self._functions["do_time_step"])
 
     def finalize_time_step(self) -> None:
-        with cd(self.working_directory):
-            self._execute_function(self.lib.finalize_time_step)
+        with self._cd():
+            self._execute_function(self._functions["finalize_time_step"])
 
     def get_subcomponent_count(self) -> int:
         count = c_int(0)
-        self._execute_function(self.lib.get_subcomponent_count, byref(count))
+        self._execute_function(self._functions["get_subcomponent_count"], byref(count))
         return count.value
 
     def prepare_solve(self, component_id: int = 1) -> None:
         cid = c_int(component_id)
-        with cd(self.working_directory):
-            self._execute_function(self.lib.prepare_solve, byref(cid))
+        with self._cd():
+            self._execute_function(self._functions["prepare_solve"], byref(cid))
 
     def solve(self, component_id: int = 1) -> bool:
-        cid = c_int(component_id)
-        has_converged = c_int(0)
-        with cd(self.working_directory):
-            self._execute_function(self.lib.solve, byref(cid), byref(has_converged))
+        cid = self._c_component_id
+        cid.value = component_id
+        has_converged = self._c_has_converged
+        with self._cd():
+            self._execute_function(self._functions["solve"], cid, has_converged)
         return has_converged.value == 1
 
     def finalize_solve(self, component_id: int = 1) -> None:
         cid = c_int(component_id)
 
-        with cd(self.working_directory):
-            self._execute_function(self.lib.finalize_solve, byref(cid))
+        with self._cd():
+            self._execute_function(self._functions["finalize_solve"], byref(cid))
 
     def get_var_address(
         self, var_name: str, component_name: str, subcomponent_name: str = ""
+    ) -> str:
+        key = (var_name.upper(), component_name.upper(), subcomponent_name.upper())
+        address = self._var_addresses.get(key)
+        if address is None:
+            address = self._var_addresses[key] = self._get_var_address(*key)
+        return address
+
+    def _get_var_address(
+        self, var_name: str, component_name: str, subcomponent_name: str
     ) -> str:
         len_var_address = self.get_constant_int("BMI_LENVARADDRESS")
         var_address = create_string_buffer(len_var_address)
         self._execute_function(
-            self.lib.get_var_address,
-            c_char_p(component_name.upper().encode()),
-            c_char_p(subcomponent_name.upper().encode()),
-            c_char_p(var_name.upper().encode()),
+            self._functions["get_var_address"],
+            c_char_p(component_name.encode()),
+            c_char_p(subcomponent_name.encode()),
+            c_char_p(var_name.encode()),
             byref(var_address),
         )
 
         return var_address.value.decode()
 
-    def _execute_function(
-        self, function: Callable[[Any], int], *args: Any, **kwargs: Any
+    def _execute_function_fast(
+        self, function: Callable[..., int], *args: Any, **kwargs: Any
     ) -> None:
         """
         Utility function to execute a BMI function in the kernel and checks its status
         """
+        if function(*args) != 0:
+            self._raise_function_error(function, *args, **kwargs)
 
-        if self.timing:
-            self.timer.start(function.__name__)
+    def _execute_function_hooked(
+        self, function: Callable[..., int], *args: Any, **kwargs: Any
+    ) -> None:
+        """
+        Utility function to execute a BMI function in the kernel and checks its
+        status, while calling the active hooks around it
+        """
+        hooks = self._active_hooks
+        call = FunctionCall(
+            function.__name__,
+            args,
+            kwargs.get("detail"),
+            nbytes=kwargs.get("nbytes", 0),
+        )
+        for hook in hooks:
+            hook.pre_call(call)
 
+        call.start_ns = time.perf_counter_ns()
         try:
             # Execute library function
-            result = function(*args)
+            call.result = function(*args)
+        finally:
+            call.end_ns = time.perf_counter_ns()
+            for hook in reversed(hooks):
+                hook.post_call(call)
 
-            if self.logger.isEnabledFor(logging.DEBUG):
-                self.logger.debug(
-                    "execute function: %s returned %s",
-                    repr_function_call(function.__name__, *args),
-                    result,
-                )
+        if call.result != Status.SUCCESS:
+            self._raise_function_error(function, *args, **kwargs)
 
-            if result != Status.SUCCESS:
-                msg = "BMI exception in "
-                msg += repr_function_call(function.__name__, *args)
-
-                # try to get detailed error msg, beware:
-                # directly call CDLL methods to avoid recursion
-                try:
-                    len_err_msg = self.get_constant_int("BMI_LENERRMESSAGE")
-                    err_msg = create_string_buffer(len_err_msg)
-                    self.lib.get_last_bmi_error(byref(err_msg))
-
-                    len_name = self.get_constant_int("BMI_LENCOMPONENTNAME")
-                    component_name = create_string_buffer(len_name)
-                    self.lib.get_component_name(byref(component_name))
-
-                    if "detail" in kwargs:
-                        detail = f", details : '{kwargs['detail']}'"
-                    else:
-                        detail = ""
-                    msg += (
-                        f": Message from {component_name.value.decode()} "
-                        + f"'{err_msg.value.decode()}'"
-                        + detail
-                    )
-                except AttributeError:
-                    self.logger.error("Couldn't extract error message")
+    def _raise_function_error(
+        self, function: Callable[..., int], *args: Any, **kwargs: Any
+    ) -> None:
+        msg = "BMI exception in "
+        msg += repr_function_call(function.__name__, *args)
 
-                raise XMIError(msg)
+        # try to get detailed error msg, beware:
+        # directly call CDLL methods to avoid recursion
+        try:
+            len_err_msg = self.get_constant_int("BMI_LENERRMESSAGE")
+            err_msg = create_string_buffer(len_err_msg)
+            self.lib.get_last_bmi_error(byref(err_msg))
+
+            len_name = self.get_constant_int("BMI_LENCOMPONENTNAME")
+            component_name = create_string_buffer(len_name)
+            self.lib.get_component_name(byref(component_name))
+
+            detail = f", details : '{kwargs['detail']}'" if "detail" in kwargs else ""
+            msg += (
+                f": Message from {component_name.value.decode()} "
+                + f"'{err_msg.value.decode()}'"
+                + detail
+            )
+        except AttributeError:
+            self.logger.error("Couldn't extract error message")
 
-        finally:
-            if self.timing:
-                self.timer.stop(function.__name__)
+        raise XMIError(msg)